@@ -0,0 +1,70 @@
+"""Angle labels in degrees or as fractions of π, shared by both pages.
+
+Labels for whole degrees in one turn are built once into lookup tables;
+anything else (non-integral or out-of-range angles) is formatted on the
+fly the same way. Radian labels use the nearest fraction of π with a
+denominator of at most 12: "0", "π", "2π", "1π/6", "5π/4".
+
+Degree labels keep the type of the value passed in, so ``30`` gives
+"30°" and ``30.0`` gives "30.0°".
+"""
+import numbers
+from fractions import Fraction
+
+import numpy as np
+
+MAX_DENOMINATOR = 12
+TABLE_DEGREES = range(0, 361)
+
+
+def _fraction_of_pi(deg):
+    frac = Fraction(deg, 180).limit_denominator(MAX_DENOMINATOR)
+    return frac.numerator, frac.denominator
+
+
+def _pi_text(numerator, denominator):
+    if numerator == 0:
+        return "0"
+    elif numerator == 1 and denominator == 1:
+        return "π"
+    elif denominator == 1:
+        return f"{numerator}π"
+    return f"{numerator}π/{denominator}"
+
+
+PI_FRACTIONS = [_fraction_of_pi(deg) for deg in TABLE_DEGREES]
+LABELS = {
+    "degrees": np.array([f"{deg}°" for deg in TABLE_DEGREES], dtype=object),
+    "radians": np.array([_pi_text(*frac) for frac in PI_FRACTIONS], dtype=object),
+}
+
+
+def _in_table(deg):
+    return isinstance(deg, numbers.Integral) and TABLE_DEGREES.start <= deg < TABLE_DEGREES.stop
+
+
+def fraction_of_pi(deg):
+    """``(numerator, denominator)`` of the whole-degree angle ``deg`` as a fraction of π."""
+    return PI_FRACTIONS[deg] if _in_table(deg) else _fraction_of_pi(deg)
+
+
+def pi_label(deg):
+    """Label of the whole-degree angle ``deg`` as a fraction of π."""
+    return LABELS["radians"][deg] if _in_table(deg) else _pi_text(*_fraction_of_pi(deg))
+
+
+def degree_label(deg):
+    return LABELS["degrees"][deg] if _in_table(deg) else f"{deg}°"
+
+
+def angle_label(deg, unit="degrees"):
+    """Label of ``deg`` degrees in ``unit``; radians need a whole number of degrees."""
+    return degree_label(deg) if unit == "degrees" else pi_label(deg)
+
+
+def angle_labels(degrees, unit="degrees"):
+    """``angle_label`` for every angle in ``degrees``, by table lookup where possible."""
+    degrees = np.asarray(degrees)
+    if degrees.dtype.kind in "iu" and (len(degrees) == 0 or (degrees.min() >= 0 and degrees.max() <= 360)):
+        return LABELS[unit][degrees].tolist()
+    return [angle_label(deg, unit) for deg in degrees.tolist()]
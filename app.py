@@ -1,14 +1,51 @@
 # app.py
+import startup  # noqa: F401  (first, so startup timings include every import)
+
+import logging
+
 import dash
 from dash import html, dcc, callback, Input, Output, State
 import dash_bootstrap_components as dbc
 
+import compression
+import config
+import figure_routes
+import figure_store
+import metrics
+
+logging.basicConfig(level=config.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+background_callback_manager = None
+if config.CIRC_BACKGROUND:
+    import diskcache
+
+    background_callback_manager = dash.DiskcacheManager(diskcache.Cache(config.BACKGROUND_CACHE_DIR))
+
+external_scripts = []
+if config.FIGURE_ARRAY_ENCODING == "base64":
+    # dcc.Graph draws with window.Plotly when set; its own plotly.js cannot
+    # read typed arrays.
+    external_scripts.append(figure_routes.PLOTLYJS_URL)
+
 app = dash.Dash(
     __name__,
     use_pages=True,
-    external_stylesheets=[dbc.themes.BOOTSTRAP]
+    external_stylesheets=[dbc.themes.BOOTSTRAP],
+    external_scripts=external_scripts,
+    background_callback_manager=background_callback_manager
 )
 server = app.server
+# after_request hooks run in reverse order: payloads are spliced in, then
+# the response is compressed, then its size is recorded.
+metrics.init_app(server)
+compression.init_app(server)
+figure_store.init_app(server)
+figure_routes.init_app(server)
+startup.init_app(server)
+
+if config.PRELOAD_FIGURES:
+    import circ_func_defs_plot  # noqa: F401
+    import trig_connection_plot  # noqa: F401
 
 app.layout = dbc.Container([
     dbc.Row([
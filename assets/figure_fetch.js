@@ -0,0 +1,40 @@
+// Clientside callbacks used when the app runs with FIGURE_FETCH=1. Each
+// page loads its figure from the GET routes in figure_routes.py, so the
+// browser cache and shared proxies answer repeat requests; the server only
+// sees a request when nothing along the way holds that figure yet.
+
+(function () {
+    function figureUrl(template, fields) {
+        return template.replace(/\{(\w+)\}/g, function (_, name) {
+            return encodeURIComponent(fields[name]);
+        });
+    }
+
+    function fetchFigure(url) {
+        return fetch(url).then(function (response) {
+            if (!response.ok) {
+                throw new Error(url + ": " + response.status);
+            }
+            return response.json();
+        });
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        figure_fetch: {
+            circ_figure: function (theme, unit, resolution, urlTemplate) {
+                return fetchFigure(figureUrl(urlTemplate, {
+                    unit: unit || "degrees",
+                    template: theme === "dark" ? "plotly_dark" : "plotly_white",
+                    resolution: resolution
+                }));
+            },
+            trig_figure: function (angle, unit, symmetries, urlTemplate) {
+                return fetchFigure(figureUrl(urlTemplate, {
+                    unit: unit,
+                    symmetries: (symmetries || []).slice().sort().join("") || "Q1",
+                    angle: angle
+                }));
+            }
+        }
+    });
+})();
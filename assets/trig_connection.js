@@ -0,0 +1,255 @@
+// Browser port of create_trig_connection_figure (trig_connection_plot.py).
+// Used when the app runs with TRIG_CLIENTSIDE=1; the Python builder stays
+// the reference implementation, so keep the two in step. Curves use the
+// original fixed sample counts (CURVE_TOLERANCE_PX=0); they cost nothing
+// on the wire here.
+
+(function () {
+    function gcd(a, b) {
+        while (b) {
+            var t = b;
+            b = a % b;
+            a = t;
+        }
+        return Math.abs(a);
+    }
+
+    // Fraction(numerator, denominator).limit_denominator(maxDenominator)
+    function limitDenominator(numerator, denominator, maxDenominator) {
+        var g = gcd(numerator, denominator);
+        var n = numerator / g, d = denominator / g;
+        var origDen = d;
+        if (d <= maxDenominator) {
+            return [n, d];
+        }
+        var p0 = 0, q0 = 1, p1 = 1, q1 = 0;
+        while (true) {
+            var a = Math.floor(n / d);
+            var q2 = q0 + a * q1;
+            if (q2 > maxDenominator) {
+                break;
+            }
+            var np1 = p0 + a * p1;
+            p0 = p1; q0 = q1; p1 = np1; q1 = q2;
+            var nd = n - a * d;
+            n = d; d = nd;
+        }
+        var k = Math.floor((maxDenominator - q0) / q1);
+        if (2 * d * (q0 + k * q1) <= origDen) {
+            return [p1, q1];
+        }
+        return [p0 + k * p1, q0 + k * q1];
+    }
+
+    // Python's f"{value:.Nf}", which keeps the sign of negative zero.
+    function fixed(value, digits) {
+        var sign = (value < 0 || Object.is(value, -0)) ? "-" : "";
+        return sign + Math.abs(value).toFixed(digits);
+    }
+
+    function linspace(start, stop, num) {
+        var step = (stop - start) / (num - 1);
+        var out = new Array(num);
+        for (var i = 0; i < num; i++) {
+            out[i] = i * step + start;
+        }
+        out[num - 1] = stop;
+        return out;
+    }
+
+    function piLabel(deg) {
+        var frac = limitDenominator(deg, 180, 12);
+        if (frac[0] === 0) {
+            return "0";
+        } else if (frac[0] === 1 && frac[1] === 1) {
+            return "π";
+        } else if (frac[1] === 1) {
+            return frac[0] + "π";
+        }
+        return frac[0] + "π/" + frac[1];
+    }
+
+    function createTrigConnectionFigure(unit, symmetries, currentAngle, template) {
+        symmetries = symmetries || [];
+        var angleDeg = Number(currentAngle);
+        var angleRad = angleDeg * (Math.PI / 180);
+        var x = Math.cos(angleRad), y = Math.sin(angleRad);
+        var arcRadius = 0.35 * x;
+
+        var data = [];
+        var shapes = [];
+        var points = {};
+
+        function scatter(props) {
+            props.type = "scatter";
+            props.showlegend = false;
+            data.push(props);
+        }
+
+        function addTriangle(signX, signY) {
+            var px = signX * x, py = signY * y;
+            var quadrant = signY === 1 ? (signX === -1 ? "Q2" : "Q1") : (signX === -1 ? "Q3" : "Q4");
+            points[quadrant] = [px, py];
+
+            scatter({x: [0, px], y: [0, py], mode: "lines", line: {color: "gray", width: 2}});
+            scatter({x: [0, px], y: [0, 0], mode: "lines", line: {color: "blue", width: 3, dash: "dot"}});
+            scatter({x: [px, px], y: [0, py], mode: "lines", line: {color: "red", width: 3, dash: "dot"}});
+
+            scatter({
+                x: [px], y: [py], mode: "markers+text",
+                text: ["(<span style='color:blue'>" + fixed(px, 2) + "</span>, <span style='color:red'>" + fixed(py, 2) + "</span>)"],
+                textposition: "top right",
+                textfont: {size: 12},
+                marker: {color: "black", size: 7},
+                hoverinfo: "skip"
+            });
+
+            var arcTheta = linspace(0, angleRad, 100);
+            var arcX = arcTheta.map(function (t) { return arcRadius * Math.cos(t) * signX; });
+            var arcY = arcTheta.map(function (t) { return arcRadius * Math.sin(t) * signY; });
+            var labelTheta = unit === "degrees" ? angleDeg.toFixed(1) + "°" : piLabel(Math.trunc(angleDeg));
+            scatter({x: arcX, y: arcY, mode: "lines", line: {color: "green", dash: "dot"}});
+
+            if (quadrant !== "Q1") {
+                scatter({
+                    x: [arcRadius * 0.75 * Math.cos(angleRad / 2) * signX],
+                    y: [arcRadius * 0.75 * Math.sin(angleRad / 2) * signY],
+                    text: [labelTheta], mode: "text", textfont: {size: 10, color: "green"}
+                });
+            }
+
+            var fullAngle, fullDeg, rFactor, arcColor;
+            if (quadrant === "Q1") {
+                fullAngle = angleRad; fullDeg = angleDeg; rFactor = 1; arcColor = "green";
+            } else if (quadrant === "Q2") {
+                fullAngle = Math.PI - angleRad; fullDeg = 180 - angleDeg; rFactor = 1.1; arcColor = "#000080";
+            } else if (quadrant === "Q3") {
+                fullAngle = Math.PI + angleRad; fullDeg = 180 + angleDeg; rFactor = 1.3; arcColor = "#9932CC";
+            } else {
+                fullAngle = 2 * Math.PI - angleRad; fullDeg = 360 - angleDeg; rFactor = 1.5; arcColor = "#DC143C";
+            }
+            if (quadrant !== "Q1") {
+                arcTheta = linspace(0, fullAngle, 100);
+                arcX = arcTheta.map(function (t) { return rFactor * arcRadius * Math.cos(t); });
+                arcY = arcTheta.map(function (t) { return rFactor * arcRadius * Math.sin(t); });
+            }
+
+            var labelFull;
+            if (unit === "degrees") {
+                labelFull = "<span style='color:" + arcColor + "'>" + fixed(fullAngle * (180 / Math.PI), 0) + "°</span>";
+            } else {
+                var frac = limitDenominator(Math.round(fullDeg), 180, 12);
+                if (frac[0] === 0) {
+                    labelFull = "0";
+                } else if (frac[1] === 1) {
+                    labelFull = "<span style='color:" + arcColor + "'>" + frac[0] + "π</span>";
+                } else {
+                    labelFull = "<span style='color:" + arcColor + "'>" + frac[0] + "π/" + frac[1] + "</span>";
+                }
+            }
+
+            // The Python builder draws the coloured arc twice; mirror it.
+            scatter({x: arcX, y: arcY, mode: "lines", line: {color: arcColor, dash: "dot"}});
+            scatter({x: arcX, y: arcY, mode: "lines", line: {color: arcColor, dash: "dot"}});
+
+            scatter({
+                x: [arcRadius * rFactor * 1.2 * Math.cos(fullAngle - (angleRad / 2))],
+                y: [arcRadius * rFactor * 1.2 * Math.sin(fullAngle - (angleRad / 2))],
+                text: [labelFull],
+                mode: "text", textfont: {size: 14}
+            });
+
+            if (quadrant === "Q1") {
+                scatter({
+                    x: [px / 2], y: [-0.05 * signY], mode: "text",
+                    text: ["<span style='color:blue'>A = " + fixed(Math.abs(x), 2) + "</span>"],
+                    textfont: {size: 13}
+                });
+                scatter({
+                    x: [px + 0.05 * signX], y: [py / 2], mode: "text",
+                    text: ["<span style='color:red'>O = " + fixed(Math.abs(y), 2) + "</span>"],
+                    textfont: {size: 13}
+                });
+                scatter({
+                    x: [px / 2 - 0.05 * signX], y: [py / 2 + 0.05 * signY],
+                    mode: "text", text: ["1"], textfont: {size: 13}
+                });
+            }
+        }
+
+        var theta = linspace(0, 2 * Math.PI, 500);
+        scatter({x: theta.map(Math.cos), y: theta.map(Math.sin), mode: "lines", line: {color: "black"}});
+
+        addTriangle(1, 1);
+
+        var signs = {Q2: [-1, 1], Q3: [-1, -1], Q4: [1, -1]};
+        ["Q2", "Q3", "Q4"].forEach(function (q) {
+            if (symmetries.indexOf(q) !== -1) {
+                addTriangle(signs[q][0], signs[q][1]);
+            }
+        });
+
+        if (symmetries.indexOf("Q2") !== -1) {
+            scatter({
+                x: [points.Q2[0], points.Q1[0]], y: [points.Q2[1], points.Q1[1]],
+                mode: "lines", line: {color: "black", dash: "dash"}
+            });
+        }
+        if (symmetries.indexOf("Q3") !== -1 && symmetries.indexOf("Q4") !== -1) {
+            scatter({
+                x: [points.Q3[0], points.Q4[0]], y: [points.Q3[1], points.Q4[1]],
+                mode: "lines", line: {color: "black", dash: "dash"}
+            });
+        }
+
+        var greyed = {
+            Q2: {x0: -1.4, y0: 0, x1: 0, y1: 1.4},
+            Q3: {x0: -1.4, y0: -1.4, x1: 0, y1: 0},
+            Q4: {x0: 0, y0: -1.4, x1: 1.4, y1: 0}
+        };
+        ["Q2", "Q3", "Q4"].forEach(function (q) {
+            if (symmetries.indexOf(q) === -1) {
+                shapes.push(Object.assign({type: "rect", fillcolor: "gray", opacity: 0.3, line: {width: 0}}, greyed[q]));
+            }
+        });
+
+        var tickDegrees = [0, 30, 45, 60, 90, 120, 135, 150, 180, 210, 225, 240, 270, 300, 315, 330, 360];
+        tickDegrees.forEach(function (deg) {
+            var rad = deg * (Math.PI / 180);
+            scatter({
+                x: [0.97 * Math.cos(rad), 1.02 * Math.cos(rad)],
+                y: [0.97 * Math.sin(rad), 1.02 * Math.sin(rad)],
+                mode: "lines", line: {color: "gray", width: 1},
+                hoverinfo: "skip"
+            });
+            scatter({
+                x: [1.12 * Math.cos(rad)], y: [1.12 * Math.sin(rad)],
+                mode: "text", text: [unit === "degrees" ? deg + "°" : piLabel(deg)],
+                textfont: {size: 10},
+                hoverinfo: "skip"
+            });
+        });
+
+        var layout = {
+            template: template,
+            title: {text: "Trigonometric Triangles in All Quadrants"},
+            xaxis: {scaleanchor: "y", range: [-1.4, 1.4], zeroline: true, showgrid: false},
+            yaxis: {range: [-1.4, 1.4], zeroline: true, showgrid: false},
+            margin: {t: 40, b: 10},
+            width: 800,
+            height: 700
+        };
+        if (shapes.length) {
+            layout.shapes = shapes;
+        }
+        return {data: data, layout: layout};
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        trig_connection: {
+            create_figure: function (angle, unit, symmetries, template) {
+                return createTrigConnectionFigure(unit, symmetries, angle, template);
+            }
+        }
+    });
+})();
@@ -0,0 +1,227 @@
+"""Timing and payload-size benchmarks for the figure builders and callbacks.
+
+    python -m benchmarks.figures [--budgets FILE] [--set NAME=VALUE ...] [--json OUT]
+
+Times create_circular_function_figure for every unit and template, and
+create_trig_connection_figure over the full slider/unit/symmetry grid.
+It also measures callback round-trips through the Flask test client. Each
+measurement is checked against the budgets in benchmarks/budgets.json,
+and the exit status is 1 if any budget is exceeded.
+
+Time budgets are about twice the slowest of several runs on the
+development machine, and byte budgets about 1.2 times the (deterministic)
+sizes, so a real regression fails. On slower hardware, re-measure with
+--json and scale the time budgets, or override them with --set.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402  (registers the pages)
+import circ_func_defs_plot as circ_plot  # noqa: E402
+import trig_bundle  # noqa: E402
+import trig_connection_plot as trig_plot  # noqa: E402
+from fast_figure import encode_arrays  # noqa: E402
+from figure_store import serialize_figure  # noqa: E402
+
+DEFAULT_BUDGETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "budgets.json")
+TEMPLATES = ("plotly_white", "plotly_dark")
+
+
+def _timed(func, repeat=1):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def _p95(values):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(0.95 * len(values)))]
+
+
+def _base64_bytes(fig):
+    """Payload size with FIGURE_ARRAY_ENCODING=base64 and FIGURE_ARRAY_DTYPE=float32."""
+    from plotly.io.json import to_json_plotly
+
+    return len(to_json_plotly(encode_arrays(fig, "float32")).encode("utf-8"))
+
+
+def bench_circ_builder(repeat):
+    results = {}
+    for resolution, options in circ_plot.RESOLUTIONS.items():
+        for unit in trig_bundle.UNITS:
+            for template in TEMPLATES:
+                fig, seconds = _timed(lambda: circ_plot.create_circular_function_figure(
+                    unit=unit, plot_template=template, **options), repeat)
+                results[f"{unit}/{template}/{resolution}"] = {
+                    "seconds": seconds, "bytes": len(serialize_figure(fig)), "base64_bytes": _base64_bytes(fig),
+                }
+    return results
+
+
+def bench_trig_builder():
+    seconds, sizes = [], []
+    for unit, symmetries, angle in trig_bundle.bundle_inputs():
+        fig, elapsed = _timed(lambda: trig_plot.create_trig_connection_figure(
+            unit=unit, symmetries=list(symmetries), current_angle=str(angle), trace_layout=trig_plot.config.TRIG_TRACE_LAYOUT))
+        seconds.append(elapsed)
+        sizes.append(len(serialize_figure(fig)))
+    return {
+        "figures": len(seconds),
+        "seconds_mean": statistics.mean(seconds),
+        "seconds_p95": _p95(seconds),
+        "bytes_mean": statistics.mean(sizes),
+        "bytes_max": max(sizes),
+    }
+
+
+def _post(client, outputs, inputs, state=(), headers=None):
+    output = outputs[0] if len(outputs) == 1 else None
+    body = {
+        "output": f"{output['id']}.{output['property']}" if output
+        else ".." + "...".join(f"{o['id']}.{o['property']}" for o in outputs) + "..",
+        "outputs": output or list(outputs),
+        "inputs": list(inputs),
+        "state": list(state),
+        "changedPropIds": [],
+    }
+    start = time.perf_counter()
+    response = client.post("/_dash-update-component", json=body, headers=headers)
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"callback failed with {response.status_code}: {response.data[:200]!r}")
+    return response, elapsed
+
+
+def _circ_call(client, unit, theme=None, resolution="full", headers=None):
+    return _post(
+        client,
+        [{"id": "unit-circle-content", "property": "children"}],
+        [{"id": "theme-store", "property": "data", "value": theme},
+         {"id": "angle-unit-store", "property": "data", "value": unit},
+         {"id": "angle-resolution-toggle", "property": "value", "value": resolution}],
+        headers=headers,
+    )
+
+
+def _trig_call(client, unit, symmetries, angle, shown_key):
+    response, elapsed = _post(
+        client,
+        [{"id": "trig-connection-graph", "property": "figure"}, {"id": "trig-figure-key-store", "property": "data"}],
+        [{"id": "angle-slider", "property": "value", "value": angle},
+         {"id": "trig-angle-unit-toggle", "property": "value", "value": unit},
+         {"id": "symmetry-toggle", "property": "value", "value": list(symmetries)}],
+        [{"id": "trig-figure-key-store", "property": "data", "value": shown_key}],
+    )
+    key = json.loads(response.data)["response"]["trig-figure-key-store"]["data"]
+    return response, elapsed, key
+
+
+def _clear_caches():
+    for plot in (circ_plot, trig_plot):
+        plot.figure_cache.clear()
+        plot.payload_store.cache.clear()
+
+
+def bench_callbacks():
+    client = app.server.test_client()
+    _clear_caches()
+    response, cold = _circ_call(client, "degrees")
+    _, warm = _circ_call(client, "degrees")
+    gzipped, _ = _circ_call(client, "degrees", headers={"Accept-Encoding": "gzip"})
+
+    full_seconds, full_bytes, step_seconds, step_bytes = [], [], [], []
+    for unit in trig_bundle.UNITS:
+        for symmetries in trig_bundle.SYMMETRY_SUBSETS:
+            key = None
+            for angle in trig_bundle.SLIDER_ANGLES:
+                trig_response, elapsed, new_key = _trig_call(client, unit, symmetries, angle, key)
+                (step_seconds if key else full_seconds).append(elapsed)
+                (step_bytes if key else full_bytes).append(len(trig_response.data))
+                key = new_key
+    return {
+        "circ_cold_seconds": cold,
+        "circ_warm_seconds": warm,
+        "circ_response_bytes": len(response.data),
+        "circ_gzip_response_bytes": len(gzipped.data),
+        "trig_full_seconds_p95": _p95(full_seconds),
+        "trig_full_response_bytes_max": max(full_bytes),
+        "trig_step_seconds_p95": _p95(step_seconds),
+        "trig_step_response_bytes_max": max(step_bytes),
+    }
+
+
+def run(repeat=3):
+    circ = bench_circ_builder(repeat)
+    trig = bench_trig_builder()
+    callbacks = bench_callbacks()
+    measurements = {
+        "circ_build_seconds": max(r["seconds"] for r in circ.values()),
+        "circ_payload_bytes": max(r["bytes"] for r in circ.values()),
+        "circ_keyframes_payload_bytes": max(r["bytes"] for name, r in circ.items() if name.endswith("/keyframes")),
+        "circ_base64_payload_bytes": max(r["base64_bytes"] for r in circ.values()),
+        "trig_build_seconds_p95": trig["seconds_p95"],
+        "trig_payload_bytes_max": trig["bytes_max"],
+        **{f"callback_{name}": value for name, value in callbacks.items()},
+    }
+    return {"circ_builder": circ, "trig_builder": trig, "callbacks": callbacks}, measurements
+
+
+def check_budgets(measurements, budgets):
+    failures = []
+    for name, limit in sorted(budgets.items()):
+        value = measurements.get(name)
+        if value is None:
+            print(f"   n/a  {name:<42} {'-':>14}  budget {limit:g}")
+            continue
+        over = value > limit
+        print(f"  {'OVER' if over else 'ok':>4}  {name:<42} {value:>14.6g}  budget {limit:g}")
+        if over:
+            failures.append(name)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budgets", default=DEFAULT_BUDGETS, help="JSON file of measurement -> maximum")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="override one budget")
+    parser.add_argument("--repeat", type=int, default=3, help="repeats per Definitions build (best is kept)")
+    parser.add_argument("--json", help="write all results to this file")
+    args = parser.parse_args(argv)
+
+    with open(args.budgets) as f:
+        budgets = json.load(f)
+    for override in args.set:
+        name, _, value = override.partition("=")
+        budgets[name] = float(value)
+
+    details, measurements = run(repeat=args.repeat)
+    print("Definitions builder:")
+    for variant, result in details["circ_builder"].items():
+        print(f"  {variant:<34} {result['seconds'] * 1000:8.1f} ms  {result['bytes'] / 1e6:8.2f} MB")
+    trig = details["trig_builder"]
+    print(f"Trig builder ({trig['figures']} figures): mean {trig['seconds_mean'] * 1000:.2f} ms, "
+          f"p95 {trig['seconds_p95'] * 1000:.2f} ms, max {trig['bytes_max'] / 1e3:.1f} kB")
+    print("Budgets:")
+    failures = check_budgets(measurements, budgets)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"details": details, "measurements": measurements, "budgets": budgets}, f, indent=2)
+    if failures:
+        print(f"{len(failures)} budget(s) exceeded: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
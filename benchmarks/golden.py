@@ -0,0 +1,406 @@
+"""Golden-output equivalence checks for the optimized rendering paths.
+
+    python -m benchmarks.golden capture [--out DIR]
+    python -m benchmarks.golden compare [--ref DIR] [--candidate NAME ...] [--atol X]
+
+``capture`` renders reference figures with the canonical builders (full
+frames, classic trace layout, fixed sample counts) for a grid of inputs.
+``compare`` rebuilds each input with the candidate paths and reports
+differences. Paths that simplify curves are compared at no less than the
+coordinate error CURVE_TOLERANCE_PX allows them.
+
+The references are committed under golden/, one ``<page>.tar.xz`` of
+per-case JSON with coordinates rounded to REF_DECIMALS places, so
+``compare`` also catches changes to the canonical builders themselves.
+Re-run ``capture`` only for an intended change to the figures, and commit
+the new references with it. ``compare`` fails when references are missing.
+
+Figures are compared as drawn, not trace by trace. Every trace is broken
+into primitives: polylines split at gaps, and individual markers or text
+labels. Each primitive is keyed by its style. Two figures match when they
+draw the same set of styled primitives: coordinates agree within
+``atol``, and text and styles match exactly. Merged traces, re-sampled
+curves, duplicate traces and delta frames therefore compare equal to the
+reference they replace.
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import tarfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import circ_func_defs_plot as circ_plot  # noqa: E402
+import config  # noqa: E402
+import geometry  # noqa: E402
+import trig_bundle  # noqa: E402
+import trig_connection_plot as trig_plot  # noqa: E402
+from figure_store import serialize_figure  # noqa: E402
+
+DEFAULT_REF_DIR = os.path.join(ROOT, "golden")
+# Decimal places kept in stored coordinates; compare never uses a finer atol.
+REF_DECIMALS = 8
+DATA_KEYS = ("x", "y", "text")
+TEMPLATES = ("plotly_white", "plotly_dark")
+TRIG_ANGLES = range(0, 91, 2)
+
+# Trace types that draw the same picture.
+EQUIVALENT_TYPES = {"scattergl": "scatter"}
+
+
+def _normalize(fig):
+    """Plain JSON form of a figure, as the browser receives it."""
+    if isinstance(fig, (bytes, bytearray, memoryview)):
+        return json.loads(bytes(fig))
+    return json.loads(serialize_figure(fig))
+
+
+def _array(value):
+    if isinstance(value, dict) and "bdata" in value:
+        values = np.frombuffer(base64.b64decode(value["bdata"]), dtype=value["dtype"])
+        if values.dtype.kind == "f":
+            # NaN gaps, as null gaps are in JSON.
+            return np.where(np.isnan(values), None, values).tolist()
+        return values.tolist()
+    return value
+
+
+# --- Primitives ---------------------------------------------------------------
+
+def _style(trace):
+    style = {k: v for k, v in trace.items() if k not in DATA_KEYS}
+    style["type"] = EQUIVALENT_TYPES.get(style.get("type", "scatter"), style.get("type", "scatter"))
+    return json.dumps(style, sort_keys=True)
+
+
+def trace_primitives(trace):
+    """Polylines and point marks drawn by one scatter trace."""
+    xs = _array(trace.get("x")) or []
+    ys = _array(trace.get("y")) or []
+    texts = _array(trace.get("text"))
+    mode = trace.get("mode", "lines")
+    style = _style(trace)
+    lines, points = [], []
+    if "lines" in mode or trace.get("fill"):
+        current = []
+        for x, y in zip(xs, ys):
+            if x is None or y is None:
+                if current:
+                    lines.append((style, np.array(current, dtype=float)))
+                current = []
+            else:
+                current.append((x, y))
+        if current:
+            lines.append((style, np.array(current, dtype=float)))
+    if "markers" in mode or "text" in mode:
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            if x is None or y is None:
+                continue
+            text = texts[i] if isinstance(texts, list) else texts
+            points.append((style, float(x), float(y), text))
+    return lines, points
+
+
+def figure_primitives(traces):
+    lines, points = [], []
+    for trace in traces:
+        trace_lines, trace_points = trace_primitives(trace)
+        lines += trace_lines
+        points += trace_points
+    return lines, points
+
+
+def resolve_frames(fig):
+    """Full trace list shown at each frame, applying delta frames to the base data."""
+    resolved = {}
+    for frame in fig.get("frames", []):
+        data = list(fig["data"])
+        indices = frame.get("traces", range(len(frame["data"])))
+        for index, trace in zip(indices, frame["data"]):
+            if index < len(data):
+                data[index] = {**data[index], **trace}
+            else:
+                data.append(trace)
+        resolved[frame["name"]] = data
+    return resolved
+
+
+# --- Comparison ---------------------------------------------------------------
+
+def _point_to_polyline(points, polyline):
+    """Distance from each of ``points`` to the nearest segment of ``polyline``."""
+    if len(polyline) == 1:
+        return np.linalg.norm(points - polyline[0], axis=1)
+    a, b = polyline[:-1], polyline[1:]
+    ab = b - a
+    length2 = np.maximum((ab ** 2).sum(axis=1), 1e-300)
+    t = np.clip(((points[:, None, :] - a[None]) * ab[None]).sum(axis=2) / length2[None], 0, 1)
+    nearest = a[None] + t[..., None] * ab[None]
+    return np.linalg.norm(points[:, None, :] - nearest, axis=2).min(axis=1)
+
+
+def polyline_distance(p, q, atol=0.0):
+    """Symmetric distance between two polylines, independent of sampling.
+
+    Identically sampled polylines within ``atol`` point by point are
+    settled without the full point-to-segment search.
+    """
+    if p.shape == q.shape:
+        pointwise = np.abs(p - q).max()
+        if pointwise <= atol:
+            return pointwise
+    return max(_point_to_polyline(p, q).max(), _point_to_polyline(q, p).max())
+
+
+def _dedupe_lines(lines, atol):
+    unique = []
+    for style, line in lines:
+        if not any(s == style and len(u) == len(line) and np.allclose(u, line, atol=atol) for s, u in unique):
+            unique.append((style, line))
+    return unique
+
+
+def _dedupe_points(points, atol):
+    unique = []
+    for style, x, y, text in sorted(points, key=repr):
+        if not any(s == style and t == text and abs(ux - x) <= atol and abs(uy - y) <= atol for s, ux, uy, t in unique):
+            unique.append((style, x, y, text))
+    return unique
+
+
+def _short_style(style):
+    style = json.loads(style)
+    return ", ".join(f"{k}={json.dumps(v)}" for k, v in sorted(style.items()) if k != "showlegend")
+
+
+def compare_traces(ref_traces, cand_traces, atol, where=""):
+    diffs = []
+    ref_lines, ref_points = figure_primitives(ref_traces)
+    cand_lines, cand_points = figure_primitives(cand_traces)
+
+    ref_lines, cand_lines = _dedupe_lines(ref_lines, atol), _dedupe_lines(cand_lines, atol)
+    unmatched = list(cand_lines)
+    for style, line in ref_lines:
+        same = [i for i, (s, c) in enumerate(unmatched)
+                if s == style and c.shape == line.shape and np.abs(c - line).max() <= atol]
+        candidates = [(0.0, same[0])] if same else [
+            (polyline_distance(line, c, atol), i) for i, (s, c) in enumerate(unmatched) if s == style
+        ]
+        if not candidates:
+            diffs.append(f"{where}missing line ({len(line)} pts from {line[0].round(4).tolist()}) style {_short_style(style)}")
+            continue
+        distance, index = min(candidates)
+        if distance > atol:
+            diffs.append(f"{where}line from {line[0].round(4).tolist()} moved by {distance:.3g} (> {atol:g}), style {_short_style(style)}")
+        unmatched.pop(index)
+    for style, line in unmatched:
+        diffs.append(f"{where}extra line ({len(line)} pts from {line[0].round(4).tolist()}) style {_short_style(style)}")
+
+    ref_points, cand_points = _dedupe_points(ref_points, atol), _dedupe_points(cand_points, atol)
+    unmatched = list(cand_points)
+    for style, x, y, text in ref_points:
+        match = next((i for i, (s, cx, cy, ct) in enumerate(unmatched)
+                      if s == style and ct == text and abs(cx - x) <= atol and abs(cy - y) <= atol), None)
+        if match is None:
+            near = [p for p in unmatched if p[0] == style and abs(p[1] - x) <= atol and abs(p[2] - y) <= atol]
+            detail = f"; candidate has {near[0][3]!r} there" if near else ""
+            diffs.append(f"{where}missing mark {text!r} at ({x:.4f}, {y:.4f}){detail}, style {_short_style(style)}")
+            continue
+        unmatched.pop(match)
+    for style, x, y, text in unmatched:
+        diffs.append(f"{where}extra mark {text!r} at ({x:.4f}, {y:.4f}), style {_short_style(style)}")
+    return diffs
+
+
+def compare_values(ref, cand, atol, path):
+    if isinstance(ref, dict) and isinstance(cand, dict):
+        diffs = []
+        for key in sorted(set(ref) | set(cand), key=str):
+            if key not in cand:
+                diffs.append(f"{path}.{key}: missing in candidate")
+            elif key not in ref:
+                diffs.append(f"{path}.{key}: not in reference")
+            else:
+                diffs += compare_values(ref[key], cand[key], atol, f"{path}.{key}")
+        return diffs
+    if isinstance(ref, list) and isinstance(cand, list):
+        if len(ref) != len(cand):
+            return [f"{path}: length {len(ref)} != {len(cand)}"]
+        diffs = []
+        for i, (r, c) in enumerate(zip(ref, cand)):
+            diffs += compare_values(r, c, atol, f"{path}[{i}]")
+        return diffs
+    if isinstance(ref, (int, float)) and isinstance(cand, (int, float)) and not isinstance(ref, bool):
+        return [] if abs(ref - cand) <= atol else [f"{path}: {ref!r} != {cand!r}"]
+    return [] if ref == cand else [f"{path}: {ref!r} != {cand!r}"]
+
+
+def compare_figures(ref, cand, atol=1e-6, ignore_layout=(), allow_missing_frames=False):
+    """Human-readable differences between two figures; empty when equivalent."""
+    ref, cand = _normalize(ref), _normalize(cand)
+    ref_layout = {k: v for k, v in ref["layout"].items() if k not in ignore_layout}
+    cand_layout = {k: v for k, v in cand["layout"].items() if k not in ignore_layout}
+    diffs = compare_values(ref_layout, cand_layout, atol, "layout")
+    diffs += compare_traces(ref["data"], cand["data"], atol)
+
+    ref_frames, cand_frames = resolve_frames(ref), resolve_frames(cand)
+    for name, traces in ref_frames.items():
+        if name not in cand_frames:
+            if not allow_missing_frames:
+                diffs.append(f"frame {name}: missing in candidate")
+            continue
+        diffs += compare_traces(traces, cand_frames[name], atol, where=f"frame {name}: ")
+    for name in cand_frames.keys() - ref_frames.keys():
+        diffs.append(f"frame {name}: not in reference")
+    return diffs
+
+
+# --- Cases and candidates -----------------------------------------------------
+
+def circ_cases():
+    return [("circ", unit, template) for unit in trig_bundle.UNITS for template in TEMPLATES]
+
+
+def trig_cases():
+    return [("trig", unit, symmetries, angle)
+            for unit in trig_bundle.UNITS for symmetries in trig_bundle.SYMMETRY_SUBSETS for angle in TRIG_ANGLES]
+
+
+def case_name(case):
+    if case[0] == "circ":
+        return f"circ-{case[1]}-{case[2]}"
+    _, unit, symmetries, angle = case
+    return f"trig-{unit}-{''.join(symmetries) or 'Q1'}-{angle}"
+
+
+def reference_figure(case):
+    if case[0] == "circ":
+        return circ_plot.create_circular_function_figure(unit=case[1], plot_template=case[2], frame_mode="full", tolerance_px=0)
+    _, unit, symmetries, angle = case
+    return trig_plot.create_trig_connection_figure(
+        unit=unit, symmetries=list(symmetries), current_angle=str(angle), trace_layout="classic", tolerance_px=0)
+
+
+def _simplified_atol(*scales):
+    """Coordinate error curve simplification may introduce on the finest of these axes."""
+    return geometry.tolerance_px(config.CURVE_TOLERANCE_PX, min(scales))
+
+
+# Candidate rendering paths: name -> (page, build(case), minimum atol).
+CANDIDATES = {
+    "circ-delta": ("circ", lambda case: circ_plot.create_circular_function_figure(
+        unit=case[1], plot_template=case[2], frame_mode="delta", tolerance_px=0), 0),
+    "circ-served": ("circ", lambda case: circ_plot.get_circular_function_figure(unit=case[1], plot_template=case[2]),
+                    _simplified_atol(circ_plot.CIRCLE_SCALE, circ_plot.CURVE_SCALE)),
+    "trig-consolidated": ("trig", lambda case: trig_plot.create_trig_connection_figure(
+        unit=case[1], symmetries=list(case[2]), current_angle=str(case[3]), trace_layout="consolidated", tolerance_px=0), 0),
+    "circ-webgl": ("circ", lambda case: circ_plot.create_circular_function_figure(
+        unit=case[1], plot_template=case[2], tolerance_px=0, render_mode="webgl"), 0),
+    "trig-webgl": ("trig", lambda case: trig_plot.create_trig_connection_figure(
+        unit=case[1], symmetries=list(case[2]), current_angle=str(case[3]), tolerance_px=0, render_mode="webgl"), 0),
+    "trig-served": ("trig", lambda case: trig_plot.get_trig_connection_figure(case[1], case[2], case[3]),
+                    _simplified_atol(trig_plot.TRIG_SCALE)),
+}
+
+
+def _ref_path(ref_dir, page):
+    return os.path.join(ref_dir, f"{page}.tar.xz")
+
+
+def _reference_json(fig):
+    from plotly.io.json import to_json_plotly
+
+    # Plain arrays whatever FIGURE_ARRAY_ENCODING is, rounded so xz can share them between cases.
+    rounded = json.loads(to_json_plotly(fig), parse_float=lambda text: round(float(text), REF_DECIMALS))
+    return json.dumps(rounded, separators=(",", ":")).encode("utf-8")
+
+
+def capture(ref_dir):
+    os.makedirs(ref_dir, exist_ok=True)
+    count = 0
+    for page, cases in (("circ", circ_cases()), ("trig", trig_cases())):
+        with tarfile.open(_ref_path(ref_dir, page), "w:xz", preset=9) as archive:
+            for case in cases:
+                payload = _reference_json(reference_figure(case))
+                info = tarfile.TarInfo(case_name(case) + ".json")
+                info.size = len(payload)
+                archive.addfile(info, io.BytesIO(payload))
+        count += len(cases)
+    return count
+
+
+def load_references(ref_dir, page):
+    """``case name -> JSON bytes`` of the stored references for ``page``, or None if there are none."""
+    path = _ref_path(ref_dir, page)
+    if not os.path.exists(path):
+        return None
+    with tarfile.open(path, "r:xz") as archive:
+        return {member.name[:-len(".json")]: archive.extractfile(member).read() for member in archive}
+
+
+def compare(ref_dir, candidates, atol, max_diffs=10, ignore_layout=(), allow_missing_frames=False):
+    failed = 0
+    references = {}
+    for name in candidates:
+        page, build, min_atol = CANDIDATES[name]
+        cases = circ_cases() if page == "circ" else trig_cases()
+        if page not in references:
+            references[page] = load_references(ref_dir, page)
+        refs = references[page]
+        if refs is None:
+            print(f"[{name}] no references at {_ref_path(ref_dir, page)}; run capture")
+            failed += len(cases)
+            continue
+        bad_cases = 0
+        for case in cases:
+            ref = refs.get(case_name(case))
+            if ref is None:
+                diffs = ["no reference"]
+            else:
+                diffs = compare_figures(ref, build(case), atol=max(atol, min_atol, 10 ** -REF_DECIMALS),
+                                        ignore_layout=ignore_layout, allow_missing_frames=allow_missing_frames)
+            if diffs:
+                bad_cases += 1
+                print(f"[{name}] {case_name(case)}: {len(diffs)} difference(s)")
+                for diff in diffs[:max_diffs]:
+                    print(f"    {diff}")
+                if len(diffs) > max_diffs:
+                    print(f"    ... {len(diffs) - max_diffs} more")
+        print(f"[{name}] {len(cases) - bad_cases}/{len(cases)} cases match")
+        failed += bad_cases
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    capture_parser = sub.add_parser("capture", help="render reference figures")
+    capture_parser.add_argument("--out", default=DEFAULT_REF_DIR)
+    compare_parser = sub.add_parser("compare", help="check candidate paths against the references")
+    compare_parser.add_argument("--ref", default=DEFAULT_REF_DIR)
+    compare_parser.add_argument("--candidate", action="append", choices=sorted(CANDIDATES),
+                                help="candidate path to check (default: all)")
+    compare_parser.add_argument("--atol", type=float, default=1e-6, help="coordinate tolerance in data units")
+    compare_parser.add_argument("--max-diffs", type=int, default=10, help="differences shown per case")
+    compare_parser.add_argument("--ignore-layout", action="append", default=[], metavar="KEY",
+                                help="top-level layout key to leave out of the comparison")
+    compare_parser.add_argument("--allow-missing-frames", action="store_true",
+                                help="only compare frames the candidate ships")
+    args = parser.parse_args(argv)
+
+    if args.command == "capture":
+        print(f"captured {capture(args.out)} reference figures in {args.out}")
+        return 0
+    failed = compare(args.ref, args.candidate or sorted(CANDIDATES), args.atol, args.max_diffs,
+                     tuple(args.ignore_layout), args.allow_missing_frames)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
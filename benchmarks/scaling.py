@@ -0,0 +1,62 @@
+"""How the Definitions build scales with frame-building processes.
+
+    python -m benchmarks.scaling [--max-workers N] [--chunk-size C] [--step-deg S]
+                                 [--frame-mode delta|full] [--repeat R] [--json OUT]
+
+Times create_circular_function_figure with 1 to N worker processes
+(default: the CPU count) and prints the speedup over 1. Worker pools are
+started before timing, so process start-up is not counted; moving the
+frames back to the parent is.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import circ_func_defs_plot as circ_plot  # noqa: E402
+
+
+def bench(workers, chunk_size, step_deg, frame_mode, repeat):
+    def build():
+        return circ_plot.create_circular_function_figure(
+            step_deg=step_deg, frame_mode=frame_mode, workers=workers, chunk_size=chunk_size)
+
+    build()  # warm-up: starts the pool and imports in the workers
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=circ_plot.config.CIRC_BUILD_CHUNK)
+    parser.add_argument("--step-deg", type=int, default=1)
+    parser.add_argument("--frame-mode", default="delta", choices=("delta", "full"))
+    parser.add_argument("--repeat", type=int, default=5, help="repeats per worker count (best is kept)")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    print(f"{os.cpu_count()} CPUs, {360 // args.step_deg + 1} frames, chunks of {args.chunk_size}, frame_mode={args.frame_mode}")
+    results = {}
+    for workers in range(1, args.max_workers + 1):
+        seconds = bench(workers, args.chunk_size, args.step_deg, args.frame_mode, args.repeat)
+        results[workers] = seconds
+        print(f"  {workers:>3} workers  {seconds * 1000:8.1f} ms  x{results[1] / seconds:5.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"chunk_size": args.chunk_size, "step_deg": args.step_deg, "frame_mode": args.frame_mode,
+                       "seconds": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+from plotly.subplots import make_subplots
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import logging
+import math
+import multiprocessing
+import os
+
+import angle_format
+import config
+import geometry
+import metrics
+from fast_figure import scatter, frame, template, merge, finalize, use_webgl
+from figure_cache import FigureCache
+from figure_store import FigurePayloadStore, payload_cache
+
+
+logger = logging.getLogger(__name__)
+
+def format_angle_label(angle_deg, unit="degrees"):
+    return "θ = " + angle_format.angle_label(angle_deg, unit)
+
+def format_slider_ticks(degrees_list, unit):
+    return angle_format.angle_labels(degrees_list, unit)
+
+def angle_deg_to_unit(angle_deg, unit):
+    return angle_deg if unit == "degrees" else np.radians(angle_deg)
+
+def get_axis_tickvals(unit):
+    if unit == "degrees":
+        return list(range(0, 361, 30)), list(map(str, range(0, 361, 30)))
+    else:
+        degs = list(range(0, 361, 30))
+        vals = [round(np.radians(d), 6) for d in degs]
+        labels = angle_format.angle_labels(degs, "radians")
+        return vals, labels
+
+def compute_frame_geometry(angle_degrees, unit, arc_samples=100, arc_radius=0.3, label_radius=0.6):
+    """Arc, fill polygon and label geometry for every frame angle at once.
+
+    Entry ``i`` of each list holds the geometry for ``angle_degrees[i]``.
+    ``arc_samples`` is one count for all frames or an array with a count
+    per frame; each arc is sampled like ``np.linspace(0, rad, count)``.
+    """
+    rad = np.radians(angle_degrees)
+    counts = np.broadcast_to(arc_samples, rad.shape)
+    arc_x, arc_y, starts = geometry.ragged_arcs(arc_radius, rad, counts)
+    # Each fill polygon is its arc closed through the origin at both ends.
+    shift = 2 * np.arange(len(rad))
+    inner = np.arange(len(arc_x)) + np.repeat(shift, counts) + 1
+    fill_x = np.zeros(len(arc_x) + 2 * len(rad))
+    fill_y = np.zeros(len(arc_x) + 2 * len(rad))
+    fill_x[inner] = arc_x
+    fill_y[inner] = arc_y
+    return {
+        "arc_x": np.split(arc_x, starts[1:]),
+        "arc_y": np.split(arc_y, starts[1:]),
+        "fill_x": np.split(fill_x, starts[1:] + shift[1:]),
+        "fill_y": np.split(fill_y, starts[1:] + shift[1:]),
+        "label_x": label_radius * np.cos(rad / 2),
+        "label_y": label_radius * np.sin(rad / 2),
+        "labels": ["θ = " + label for label in angle_format.angle_labels(angle_degrees, unit)],
+    }
+
+@lru_cache(maxsize=None)
+def _subplot_layout():
+    """Axis domains and subplot titles from make_subplots, built only once."""
+    layout = make_subplots(
+        rows=2, cols=2,
+        specs=[[{"rowspan": 2}, {}], [None, {}]],
+        column_widths=[0.6, 0.4],
+        horizontal_spacing=0.1,
+        vertical_spacing=0.3,
+        subplot_titles=("Unit Circle", "cos(θ)", "sin(θ)")
+    ).to_plotly_json()["layout"]
+    layout.pop("template", None)
+    return layout
+
+# Pixels per data unit on the unit circle and on the shorter cos/sin plot,
+# from the figure size, margins and axes in the layout below.
+CIRCLE_SCALE = geometry.axis_scale(750, 100 + 80, (0, 1), (-1.5, 1.5))
+CURVE_SCALE = geometry.axis_scale(750, 100 + 80, (0, 0.35), (-1.3, 1.3))
+
+ARC_RADIUS = 0.3
+
+# Traces 0-2 (unit circle, cos and sin curves) never change between frames.
+MOVING_TRACE_INDICES = list(range(3, 10))
+
+# Named animation resolutions: degrees between frames, and the easing plotly
+# uses to transition between them (None jumps from frame to frame).
+RESOLUTIONS = {
+    "full": dict(step_deg=1, easing=None),
+    "keyframes": dict(step_deg=config.CIRC_KEYFRAME_STEP, easing="cubic-in-out"),
+}
+
+# Playback speed, whatever the resolution.
+MS_PER_DEGREE = 30
+
+def _frames_for(angle_degrees, unit, frame_mode, arc_counts, static_traces):
+    """Animation frames for ``angle_degrees``; ``arc_counts`` holds their arc sample counts."""
+    angle_degrees = np.asarray(angle_degrees)
+    angle_units = np.array([angle_deg_to_unit(deg, unit) for deg in angle_degrees])
+    angle_radians = np.radians(angle_degrees)
+    cos_vals = np.cos(angle_radians)
+    sin_vals = np.sin(angle_radians)
+    frame_geometry = compute_frame_geometry(angle_degrees, unit, arc_samples=arc_counts, arc_radius=ARC_RADIUS)
+
+    frames = []
+    for i, (deg, angle_val, cos_val, sin_val) in enumerate(zip(angle_degrees, angle_units, cos_vals, sin_vals)):
+        label = frame_geometry["labels"][i]
+        arc_x = frame_geometry["arc_x"][i]
+        arc_y = frame_geometry["arc_y"][i]
+
+        moving_traces = [
+            scatter(x=frame_geometry["fill_x"][i], y=frame_geometry["fill_y"][i], fill='toself', fillcolor='rgba(0,100,255,0.2)', line=dict(color='rgba(0,0,0,0)'), mode='lines', showlegend=False, xaxis="x", yaxis="y"),
+            scatter(x=[0, cos_val], y=[0, sin_val], mode='lines+markers', line=dict(color='green'), showlegend=False, xaxis="x", yaxis="y"),
+            scatter(x=[cos_val], y=[sin_val], mode='markers+text', text=[f"(<span style='color:blue'>{cos_val:.2f}</span>, <span style='color:red'>{sin_val:.2f}</span>)"], textposition='top right', textfont=dict(size=14), marker=dict(color='black', size=8), showlegend=False, xaxis="x", yaxis="y", hoverinfo="skip", texttemplate="%{text}"),
+            scatter(x=arc_x, y=arc_y, mode='lines', line=dict(color='green', dash='dash'), showlegend=False, xaxis="x", yaxis="y"),
+            scatter(x=[frame_geometry["label_x"][i]], y=[frame_geometry["label_y"][i]], mode='text', text=[label], textfont=dict(size=14, color='darkblue'), showlegend=False, xaxis="x", yaxis="y"),
+            scatter(x=[angle_val], y=[cos_val], mode='markers+text', text=[f"{cos_val:.2f}"], textposition="top center", marker=dict(color='blue', size=10), showlegend=False, xaxis="x2", yaxis="y2"),
+            scatter(x=[angle_val], y=[sin_val], mode='markers+text', text=[f"{sin_val:.2f}"], textposition="top center", marker=dict(color='red', size=10), showlegend=False, xaxis="x3", yaxis="y3")
+        ]
+
+        if frame_mode == "delta":
+            # Only the angle-dependent traces change; address them by index.
+            frames.append(frame(str(deg), moving_traces, traces=MOVING_TRACE_INDICES))
+        else:
+            frames.append(frame(str(deg), static_traces + moving_traces))
+    return frames
+
+
+# Worker processes for build_frames by (pid, workers). A forked child starts
+# its own pool rather than using its parent's. Workers are not forked from
+# the (threaded) server process, which can deadlock on a lock another
+# thread held, but started from a fresh forkserver, or spawned where there
+# is none.
+_frame_pools = {}
+_FRAME_POOL_START = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+def _pool(workers):
+    key = (os.getpid(), workers)
+    if key not in _frame_pools:
+        _frame_pools[key] = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context(_FRAME_POOL_START)
+        )
+    return _frame_pools[key]
+
+def build_frames(angle_degrees, unit, frame_mode, arc_counts, static_traces, workers=1, chunk_size=config.CIRC_BUILD_CHUNK):
+    """Frames for every angle, built in ``workers`` processes when more than one.
+
+    The angles are split into ranges of ``chunk_size``; frames depend only
+    on their own angle, so the result is the same whatever the split.
+    """
+    arc_counts = np.broadcast_to(arc_counts, np.shape(angle_degrees))
+    if workers <= 1 or len(angle_degrees) <= chunk_size:
+        return _frames_for(angle_degrees, unit, frame_mode, arc_counts, static_traces)
+    starts = range(0, len(angle_degrees), chunk_size)
+    # Delta frames never read the static traces; don't pickle them into every chunk.
+    static_traces = static_traces if frame_mode == "full" else None
+    futures = [
+        _pool(workers).submit(_frames_for, angle_degrees[start:start + chunk_size], unit, frame_mode,
+                              arc_counts[start:start + chunk_size], static_traces)
+        for start in starts
+    ]
+    return [built for future in futures for built in future.result()]
+
+def create_circular_function_figure(unit="degrees", plot_template="plotly_white", frame_mode="delta", step_deg=1, easing=None,
+                                    tolerance_px=config.CURVE_TOLERANCE_PX, render_mode=config.RENDER_MODE,
+                                    workers=config.CIRC_BUILD_WORKERS, chunk_size=config.CIRC_BUILD_CHUNK):
+    """Animated unit circle with cos/sin plots.
+
+    ``frame_mode="delta"`` ships only the angle-dependent traces in each
+    frame; ``"full"`` repeats all ten traces per frame. There is a frame
+    every ``step_deg`` degrees (a divisor of 360); with ``easing`` set,
+    plotly tweens between them instead of jumping. Circles, arcs and
+    curves are sampled to stay within ``tolerance_px`` screen pixels of
+    the true shape (0 keeps the original fixed sample counts).
+    ``render_mode="webgl"`` draws lines and markers with WebGL; WebGL
+    traces cannot be tweened, so keyframes are then shown without easing.
+    With ``workers`` above 1, frames are built in that many processes,
+    ``chunk_size`` angles at a time (see ``build_frames``).
+    """
+    if step_deg <= 0 or 360 % step_deg:
+        raise ValueError(f"step_deg must divide 360, got {step_deg!r}")
+    logger.debug("building circular function figure unit=%s plot_template=%s frame_mode=%s step_deg=%s",
+                 unit, plot_template, frame_mode, step_deg)
+    if render_mode == "webgl":
+        easing = None
+    circle_tolerance = geometry.tolerance_px(tolerance_px, CIRCLE_SCALE)
+    curve_tolerance = geometry.tolerance_px(tolerance_px, CURVE_SCALE)
+
+    theta = np.linspace(0, 2 * np.pi, geometry.arc_samples(1, 2 * np.pi, circle_tolerance, 500))
+    circle_x = np.cos(theta)
+    circle_y = np.sin(theta)
+
+    # The cos/sin curves do not depend on the frame resolution.
+    curve_degrees = np.linspace(0, 360, geometry.curve_samples(2 * np.pi, 1, curve_tolerance, 361))
+    curve_units = np.array([angle_deg_to_unit(deg, unit) for deg in curve_degrees])
+    curve_radians = np.radians(curve_degrees)
+
+    static_traces = [
+        scatter(x=circle_x, y=circle_y, mode="lines", line=dict(color="black"), showlegend=False, xaxis="x", yaxis="y"),
+        scatter(x=curve_units, y=np.cos(curve_radians), mode="lines", line=dict(color="blue"), showlegend=False, xaxis="x2", yaxis="y2"),
+        scatter(x=curve_units, y=np.sin(curve_radians), mode="lines", line=dict(color="red"), showlegend=False, xaxis="x3", yaxis="y3"),
+    ]
+
+    angle_degrees = np.arange(0, 361, step_deg)
+    angle_radians = np.radians(angle_degrees)
+
+    if easing is None:
+        arc_counts = geometry.arc_sample_counts(ARC_RADIUS, angle_radians, circle_tolerance, 100)
+    else:
+        # Tweening needs the same number of points in every frame.
+        arc_counts = geometry.arc_samples(ARC_RADIUS, 2 * np.pi, circle_tolerance, 100)
+
+    # Slider stops every 15°, or as close as the frames allow.
+    tick_step = math.lcm(15, step_deg)
+    tick_angles = list(range(0, 361, tick_step))
+    tick_labels = format_slider_ticks(tick_angles, unit)
+
+    if easing is None:
+        step_args = {"mode": "immediate", "frame": {"duration": 0, "redraw": True}}
+        slider_transition = {"duration": 0}
+        play_args = {"frame": {"duration": MS_PER_DEGREE, "redraw": True}, "fromcurrent": True}
+    else:
+        # Tweening only happens without a full redraw.
+        step_ms = MS_PER_DEGREE * step_deg
+        slider_transition = {"duration": 300, "easing": easing}
+        step_args = {"mode": "immediate", "frame": {"duration": 300, "redraw": False}, "transition": slider_transition}
+        play_args = {"frame": {"duration": step_ms, "redraw": False},
+                     "transition": {"duration": step_ms, "easing": "linear"}, "fromcurrent": True}
+
+    frames = build_frames(angle_degrees, unit, frame_mode, arc_counts, static_traces, workers=workers, chunk_size=chunk_size)
+
+    x_title = "θ (degrees)" if unit == "degrees" else "θ (radians)"
+    x_range = [0, 385] if unit == "degrees" else [0, 2.1 * np.pi]
+    tickvals, ticktext = get_axis_tickvals(unit)
+
+    layout = merge(_subplot_layout(), dict(
+        template=template(plot_template),
+        width=1200,
+        height=750,
+        margin=dict(t=100, b=80),
+        xaxis=dict(domain=[0, 0.55], range=[-1.5, 1.5], scaleanchor='y'),
+        yaxis=dict(domain=[0, 1], range=[-1.5, 1.5]),
+        xaxis2=dict(domain=[0.65, 1], anchor='y2', title=dict(text=x_title, standoff=20), range=x_range, tickvals=tickvals, ticktext=ticktext, tickangle=-45),
+        yaxis2=dict(domain=[0.6, 1], range=[-1.3, 1.3]),
+        xaxis3=dict(domain=[0.65, 1], anchor='y3', title=dict(text=x_title, standoff=20), range=x_range, tickvals=tickvals, ticktext=ticktext, tickangle=-45),
+        yaxis3=dict(domain=[0, 0.35], range=[-1.3, 1.3]),
+        sliders=[{
+            "steps": [{
+                "label": label,
+                "method": "animate",
+                "args": [[str(deg)], step_args],
+            } for deg, label in zip(tick_angles, tick_labels)],
+            "transition": slider_transition,
+            "x": 0.05,
+            "y": -0.07,
+            "len": 0.9
+        }],
+        updatemenus=[{
+            "type": "buttons",
+            "showactive": False,
+            "buttons": [
+                {"label": "Play", "method": "animate", "args": [None, play_args]},
+                {"label": "Pause", "method": "animate", "args": [[None], {"mode": "immediate"}]}
+            ],
+            "x": 0.03,
+            "y": -0.08
+        }]
+    ))
+
+    data = static_traces + frames[0]["data"][-len(MOVING_TRACE_INDICES):]
+    fig = dict(data=data, layout=layout, frames=frames)
+    return finalize(use_webgl(fig) if render_mode == "webgl" else fig)
+
+
+# Built figures keyed by (unit, plot_template, frame_mode, resolution), shared by every session.
+figure_cache = FigureCache(max_entries=config.FIGURE_CACHE_SIZE, max_bytes=config.FIGURE_CACHE_MAX_BYTES)
+
+def get_circular_function_figure(unit="degrees", plot_template="plotly_white", frame_mode=config.CIRC_FRAME_MODE,
+                                 resolution=config.CIRC_RESOLUTION):
+    return figure_cache.get_or_build(
+        (unit, plot_template, frame_mode, resolution),
+        lambda: create_circular_function_figure(
+            unit=unit, plot_template=plot_template, frame_mode=frame_mode, **RESOLUTIONS[resolution]
+        ),
+    )
+
+# Encoded figure JSON for the same variants, so responses skip plotly's encoder.
+payload_store = FigurePayloadStore(
+    cache=payload_cache("circ", max_entries=config.FIGURE_PAYLOAD_CACHE_SIZE, max_bytes=config.FIGURE_PAYLOAD_MAX_BYTES)
+)
+
+metrics.register_cache("circ_figures", figure_cache)
+metrics.register_cache("circ_payloads", payload_store.cache)
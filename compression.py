@@ -0,0 +1,124 @@
+"""gzip / brotli compression of responses, negotiated on ``Accept-Encoding``.
+
+``init_app`` installs an ``after_request`` hook that compresses callback
+responses, figure routes and static assets whose type is text-like. The
+server's preference order is ``config.COMPRESSION``; brotli is offered
+only when the ``brotli`` package is installed.
+
+Figures are the same bytes for every request of a variant, so large
+bodies, and any body with an ETag, are compressed once and the result is
+kept in a cache keyed by ETag or body hash (on disk under
+FIGURE_CACHE_DIR when set, like the payload caches). Compressed
+responses get their own ETag, the original with an ``-<encoding>``
+suffix. A ``before_request`` hook strips the suffix of the encoding the
+request negotiates from ``If-None-Match``, so the routes' own 304 checks
+keep working, and the 304 gets the suffix and ``Vary`` back, matching
+the compressed 200 it stands for.
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+
+import flask
+
+import config
+import metrics
+from figure_store import payload_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+# Smaller bodies are compressed per request; larger ones are cached.
+CACHE_MIN_BYTES = 64 * 1024
+
+COMPRESSORS = {
+    "gzip": lambda body: gzip.compress(body, compresslevel=config.GZIP_LEVEL, mtime=0),
+}
+if brotli is not None:
+    COMPRESSORS["br"] = lambda body: brotli.compress(body, quality=config.BROTLI_QUALITY)
+
+ENCODINGS = [name for name in config.COMPRESSION if name in COMPRESSORS]
+
+compressed_cache = payload_cache(
+    "compressed", max_entries=config.COMPRESSION_CACHE_SIZE, max_bytes=config.COMPRESSION_CACHE_MAX_BYTES
+)
+metrics.register_cache("compressed_responses", compressed_cache)
+
+def _compressible(response):
+    return (
+        response.status_code == 200
+        and "Content-Encoding" not in response.headers
+        # Files have a length; generators of unknown length are left alone.
+        and not (response.is_streamed and response.content_length is None)
+        and (response.mimetype or "").startswith(COMPRESSIBLE_TYPES)
+    )
+
+
+def _not_modified(response):
+    """Give a 304 the ``Vary`` and ETag of the 200 the client holds."""
+    # A 304 has no Content-Type, so the type is guessed from the URL.
+    mimetype, _ = mimetypes.guess_type(flask.request.path)
+    if (mimetype or "").startswith(COMPRESSIBLE_TYPES):
+        response.vary.add("Accept-Encoding")
+    encoding = flask.g.pop("etag_encoding", None)
+    etag, weak = response.get_etag()
+    if encoding is not None and etag is not None:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+
+def compress(body, encoding, etag=None):
+    """``body`` compressed with ``encoding``, from the cache when it has been before."""
+    if etag is None and len(body) < CACHE_MIN_BYTES:
+        return COMPRESSORS[encoding](body)
+    key = (encoding, etag or hashlib.sha1(body).hexdigest())
+    return compressed_cache.get_or_build(key, lambda: COMPRESSORS[encoding](body))
+
+
+def init_app(server):
+    if config.COMPRESSION and not ENCODINGS:
+        logger.warning("no supported encoding in COMPRESSION=%s", ",".join(config.COMPRESSION))
+    missing = [name for name in config.COMPRESSION if name not in COMPRESSORS]
+    if missing:
+        logger.warning("compression %s unavailable (is brotli installed?)", ",".join(missing))
+
+    @server.before_request
+    def _strip_encoding_etags():
+        if_none_match = flask.request.environ.get("HTTP_IF_NONE_MATCH")
+        if not if_none_match or not ENCODINGS:
+            return
+        # Only a copy in the encoding this request gets can be not modified.
+        encoding = flask.request.accept_encodings.best_match(ENCODINGS)
+        stripped = if_none_match.replace(f'-{encoding}"', '"') if encoding else if_none_match
+        if stripped != if_none_match:
+            flask.g.etag_encoding = encoding
+            flask.request.environ["HTTP_IF_NONE_MATCH"] = stripped
+
+    @server.after_request
+    def _compress_response(response):
+        if ENCODINGS and response.status_code == 304:
+            return _not_modified(response)
+        if not ENCODINGS or not _compressible(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = flask.request.accept_encodings.best_match(ENCODINGS)
+        if encoding is None:
+            return response
+        response.direct_passthrough = False
+        body = response.get_data()
+        if len(body) < config.COMPRESSION_MIN_BYTES:
+            return response
+        etag, weak = response.get_etag()
+        with metrics.phase("compress"):
+            response.set_data(compress(body, encoding, etag))
+        response.headers["Content-Encoding"] = encoding
+        if etag is not None:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
@@ -0,0 +1,123 @@
+"""Deployment settings, read once from environment variables at import time."""
+import os
+import tempfile
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+# Bounded LRU cache of built figures, shared by the pages.
+FIGURE_CACHE_SIZE = _env_int("FIGURE_CACHE_SIZE", 16)
+# Built Trig & Circle figures, which patch updates diff against; the grid
+# has 736, so the default holds all of them.
+TRIG_FIGURE_CACHE_SIZE = _env_int("TRIG_FIGURE_CACHE_SIZE", 1024)
+FIGURE_CACHE_MAX_BYTES = _env_int("FIGURE_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+
+# Serialized figure payloads kept per page, see figure_store.py.
+FIGURE_PAYLOAD_CACHE_SIZE = _env_int("FIGURE_PAYLOAD_CACHE_SIZE", 16)
+TRIG_PAYLOAD_CACHE_SIZE = _env_int("TRIG_PAYLOAD_CACHE_SIZE", 1024)
+FIGURE_PAYLOAD_MAX_BYTES = _env_int("FIGURE_PAYLOAD_MAX_BYTES", 512 * 1024 * 1024)
+
+# Directory for encoded figures shared by all worker processes (see
+# shared_cache.py). Unset keeps a separate in-memory cache per process.
+FIGURE_CACHE_DIR = os.environ.get("FIGURE_CACHE_DIR") or None
+
+# Build the Definitions figure in a Dash background callback, in a separate
+# process, so request workers are free while it builds. Needs diskcache,
+# multiprocess and psutil; job state and results go to BACKGROUND_CACHE_DIR.
+# Each job is a fresh process, so set FIGURE_CACHE_DIR too for jobs to
+# reuse each other's figures. The callback's metrics stay in the job
+# process and are missing from /metrics (see metrics.py).
+CIRC_BACKGROUND = os.environ.get("CIRC_BACKGROUND", "0") == "1"
+BACKGROUND_CACHE_DIR = os.environ.get("BACKGROUND_CACHE_DIR") or os.path.join(
+    tempfile.gettempdir(), "circular_functions_background"
+)
+
+# "delta" frames carry only the moving traces of the Definitions animation;
+# "full" repeats the static circle and curves in every frame.
+CIRC_FRAME_MODE = os.environ.get("CIRC_FRAME_MODE", "delta")
+
+# Angular resolution of the Definitions animation: "full" has a frame per
+# degree; "keyframes" has one every CIRC_KEYFRAME_STEP degrees (a divisor
+# of 360) and lets plotly ease between them. This is the default; each
+# client can switch with the page's Animation control.
+CIRC_RESOLUTION = os.environ.get("CIRC_RESOLUTION", "full")
+CIRC_KEYFRAME_STEP = _env_int("CIRC_KEYFRAME_STEP", 15)
+
+# Processes that build the Definitions animation frames, CIRC_BUILD_CHUNK
+# angles per task. 1 builds them in the calling process. Workers are not
+# forked (see circ_func_defs_plot._pool), so a script that starts the app
+# must do so under ``if __name__ == "__main__":``, as app.py does.
+CIRC_BUILD_WORKERS = _env_int("CIRC_BUILD_WORKERS", 1)
+CIRC_BUILD_CHUNK = _env_int("CIRC_BUILD_CHUNK", 32)
+
+# Circles, arcs and curves are sampled to stay within this many screen
+# pixels of the true shape; 0 keeps the original fixed sample counts.
+CURVE_TOLERANCE_PX = _env_float("CURVE_TOLERANCE_PX", 0.25)
+
+# "webgl" draws line and marker traces of both figures with WebGL
+# (scattergl), which keeps dense figures and animations smooth; text stays
+# SVG. "svg" draws everything with SVG.
+RENDER_MODE = os.environ.get("RENDER_MODE", "svg")
+
+# Seconds browsers and proxies may keep a figure from the GET routes in
+# figure_routes.py. Figure URLs change with the code, so this can be long.
+FIGURE_MAX_AGE = _env_int("FIGURE_MAX_AGE", 365 * 24 * 3600)
+
+# Load both pages' figures in the browser from those GET routes, so that
+# HTTP caches can serve them, instead of returning them from callbacks.
+FIGURE_FETCH = os.environ.get("FIGURE_FETCH", "0") == "1"
+
+# "base64" sends numeric trace arrays as base64 typed arrays, which are
+# smaller and faster for the browser to parse than JSON number lists; the
+# app then loads plotly.py's plotly.js, since dcc.Graph's own predates
+# them. FIGURE_ARRAY_DTYPE="float32" halves the floats again. "json"
+# sends plain lists. The gain is modest, because most of the Definitions
+# payload is short per-frame traces and their styles: 1.08 MB as JSON,
+# 0.96 MB as base64 and 0.72 MB with float32.
+FIGURE_ARRAY_ENCODING = os.environ.get("FIGURE_ARRAY_ENCODING", "json")
+FIGURE_ARRAY_DTYPE = os.environ.get("FIGURE_ARRAY_DTYPE", "float64")
+
+# Response encodings offered, in the server's order of preference (see
+# compression.py); empty turns compression off. "br" needs the brotli
+# package. Large and ETagged bodies are compressed once and cached, so the
+# levels can be high.
+COMPRESSION = [name.strip() for name in os.environ.get("COMPRESSION", "br,gzip").split(",") if name.strip()]
+COMPRESSION_MIN_BYTES = _env_int("COMPRESSION_MIN_BYTES", 1024)
+GZIP_LEVEL = _env_int("GZIP_LEVEL", 9)
+BROTLI_QUALITY = _env_int("BROTLI_QUALITY", 9)
+COMPRESSION_CACHE_SIZE = _env_int("COMPRESSION_CACHE_SIZE", 256)
+COMPRESSION_CACHE_MAX_BYTES = _env_int("COMPRESSION_CACHE_MAX_BYTES", 128 * 1024 * 1024)
+
+# Figure builders emit plain dict specs; set FIGURE_VALIDATE=1 to route
+# them through plotly's validating graph objects while debugging.
+FIGURE_VALIDATE = os.environ.get("FIGURE_VALIDATE", "0") == "1"
+
+# Render the Trig & Circle figure in the browser (assets/trig_connection.js)
+# instead of in the update_figure callback.
+TRIG_CLIENTSIDE = os.environ.get("TRIG_CLIENTSIDE", "0") == "1"
+
+# Send dash.Patch diffs instead of whole Trig & Circle figures.
+TRIG_PATCH_UPDATES = os.environ.get("TRIG_PATCH_UPDATES", "1") == "1"
+
+# "consolidated" merges same-styled Trig & Circle traces into a fixed set of
+# 15; "classic" emits one trace per segment and label.
+TRIG_TRACE_LAYOUT = os.environ.get("TRIG_TRACE_LAYOUT", "consolidated")
+
+# Precomputed Trig & Circle figures, built with `python trig_bundle.py build`.
+TRIG_BUNDLE_PATH = os.environ.get(
+    "TRIG_BUNDLE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "trig_figures.bundle")
+)
+
+# Figure modules (plotly, numpy) are imported on a page's first callback;
+# set PRELOAD_FIGURES=1 to import them at startup instead.
+PRELOAD_FIGURES = os.environ.get("PRELOAD_FIGURES", "0") == "1"
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "WARNING").upper()
@@ -0,0 +1,172 @@
+"""Plain-dict figure specs that bypass plotly's per-object validation.
+
+The helpers produce the same JSON as the equivalent ``go.Scatter`` /
+``go.Frame`` / ``go.Figure`` calls. ``finalize`` wraps the result in a
+validating ``go.Figure`` when ``config.FIGURE_VALIDATE`` is on.
+"""
+import base64
+from functools import lru_cache
+
+import numpy as np
+import plotly.graph_objects as go
+from dash import Patch
+import plotly.io as pio
+
+import config
+
+
+def scatter(**props):
+    return dict(type="scatter", **props)
+
+
+def frame(name, data, traces=None):
+    spec = dict(name=name, data=data)
+    if traces is not None:
+        spec["traces"] = list(traces)
+    return spec
+
+
+@lru_cache(maxsize=None)
+def template(name=None):
+    """Expanded template dict, as ``go.Figure`` embeds it in the layout."""
+    return pio.templates[name or pio.templates.default].to_plotly_json()
+
+
+def use_webgl(fig):
+    """Switch ``fig``'s line and marker scatters, in data and frames, to WebGL.
+
+    Traces that draw text stay SVG, since ``scattergl`` renders text
+    differently. Each trace is converted by its own mode, so frame traces
+    keep the type of the trace they update.
+    """
+    def convert(traces):
+        return [
+            dict(trace, type="scattergl") if trace.get("type") == "scatter" and "text" not in trace.get("mode", "lines")
+            else trace
+            for trace in traces
+        ]
+
+    fig = dict(fig, data=convert(fig["data"]))
+    if "frames" in fig:
+        fig["frames"] = [dict(f, data=convert(f["data"])) for f in fig["frames"]]
+    return fig
+
+
+# Typed-array dtype codes plotly.js understands, by numpy kind and item size.
+TYPED_ARRAY_CODES = {"f8", "f4", "i1", "u1", "i2", "u2", "i4", "u4"}
+
+# Shorter arrays stay JSON lists, which are smaller than their base64 form.
+MIN_TYPED_ARRAY_LENGTH = 8
+
+
+def _typed_array(values, float_dtype):
+    if values.dtype.kind == "f":
+        values = values.astype(float_dtype, copy=False)
+    code = f"{values.dtype.kind}{values.dtype.itemsize}"
+    if code not in TYPED_ARRAY_CODES:
+        # int64 and friends: plotly.js has no 64-bit integer arrays.
+        values = values.astype(np.float64)
+        code = "f8"
+    return {"dtype": code, "bdata": base64.b64encode(np.ascontiguousarray(values).tobytes()).decode("ascii")}
+
+
+def _short_floats(values, digits):
+    """``values`` (a list) with floats cut to ``digits`` significant digits and NaN as null."""
+    return [
+        None if value != value else float(f"{value:.{digits}g}") if isinstance(value, float) else value
+        for value in values
+    ]
+
+
+def _is_number_list(value):
+    return bool(value) and all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in value)
+
+
+def encode_arrays(fig, float_dtype="float64"):
+    """Copy of ``fig`` with the numeric arrays of its traces as base64 typed arrays.
+
+    plotly.js (2.28 and later) reads ``{"dtype": ..., "bdata": ...}`` in
+    place of a list. Floats are sent as ``float_dtype``; ``"float32"``
+    halves their size at about 7 significant digits. Arrays shorter than
+    MIN_TYPED_ARRAY_LENGTH stay lists, but with a float_dtype narrower
+    than float64 their floats are written with only as many digits as it
+    holds. Only top-level trace properties (x, y, ...) are converted, in
+    data and frames; numpy arrays and plain lists of numbers both are.
+    """
+    # Enough significant digits to keep every float_dtype value apart.
+    digits = np.finfo(float_dtype).precision + 2 if np.dtype(float_dtype).itemsize < 8 else None
+
+    def encode(value):
+        if isinstance(value, np.ndarray):
+            if value.ndim != 1 or value.dtype.kind not in "fiu":
+                return value
+            if len(value) >= MIN_TYPED_ARRAY_LENGTH:
+                return _typed_array(value, float_dtype)
+            return _short_floats(value.tolist(), digits) if digits and value.dtype.kind == "f" else value
+        if isinstance(value, list) and _is_number_list(value):
+            if len(value) >= MIN_TYPED_ARRAY_LENGTH:
+                return _typed_array(np.asarray(value), float_dtype)
+            return _short_floats(value, digits) if digits else value
+        return value
+
+    def convert(traces):
+        return [{key: encode(value) for key, value in trace.items()} for trace in traces]
+
+    fig = fig if isinstance(fig, dict) else fig.to_plotly_json()
+    fig = dict(fig, data=convert(fig["data"]))
+    if "frames" in fig:
+        fig["frames"] = [dict(f, data=convert(f["data"])) for f in fig["frames"]]
+    return fig
+
+
+def merge(base, updates):
+    """Copy of ``base`` with ``updates`` merged in, recursing into dicts."""
+    merged = dict(base)
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def finalize(fig, validate=None):
+    if config.FIGURE_VALIDATE if validate is None else validate:
+        return go.Figure(fig)
+    return fig
+
+
+def _same(a, b):
+    if a is b:
+        return True
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        # NaN gaps in float arrays count as equal.
+        floats = np.asarray(a).dtype.kind == "f" and np.asarray(b).dtype.kind == "f"
+        return np.shape(a) == np.shape(b) and np.array_equal(a, b, equal_nan=floats)
+    return a == b
+
+
+def figure_patch(old, new):
+    """``dash.Patch`` turning figure ``old`` into ``new``, or None.
+
+    Only top-level trace and layout properties that differ are sent. A
+    change in the number of traces is not patched, since the indices of
+    the remaining traces would no longer line up.
+    """
+    old, new = (fig if isinstance(fig, dict) else fig.to_plotly_json() for fig in (old, new))
+    if len(old["data"]) != len(new["data"]):
+        return None
+    patch = Patch()
+    for i, (old_trace, new_trace) in enumerate(zip(old["data"], new["data"])):
+        for key in old_trace.keys() - new_trace.keys():
+            del patch["data"][i][key]
+        for key, value in new_trace.items():
+            if key not in old_trace or not _same(old_trace[key], value):
+                patch["data"][i][key] = value
+    old_layout, new_layout = old["layout"], new["layout"]
+    for key in old_layout.keys() - new_layout.keys():
+        del patch["layout"][key]
+    for key, value in new_layout.items():
+        if key not in old_layout or not _same(old_layout[key], value):
+            patch["layout"][key] = value
+    return patch
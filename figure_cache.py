@@ -0,0 +1,127 @@
+"""Bounded LRU cache for built figures.
+
+Entries are evicted least-recently-used first whenever either the entry
+count or the approximate byte budget is exceeded. Concurrent misses for
+the same key share one build (see single_flight.py).
+"""
+import threading
+from collections import OrderedDict
+
+from single_flight import SingleFlight
+
+
+def approx_nbytes(value):
+    """Rough size of ``value`` once serialized to JSON."""
+    if hasattr(value, "to_dict"):
+        value = value.to_dict()
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if hasattr(value, "dtype") and hasattr(value, "size"):
+        # numpy arrays, duck-typed so numpy is not imported just for this.
+        return value.size * 20
+    if isinstance(value, dict):
+        return sum(len(str(k)) + approx_nbytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(approx_nbytes(v) for v in value) + len(value)
+    return 8
+
+
+class FigureCache:
+    def __init__(self, max_entries=16, max_bytes=None, sizeof=approx_nbytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._evict()
+        return value
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return True, self._entries[key][0]
+            return False, None
+
+    def get_or_build(self, key, build):
+        """Cached value for ``key``, else ``build()``'s, built once for concurrent callers.
+
+        A miss that waits for another caller's build counts as coalesced.
+        """
+        found, value = self._lookup(key)
+        with self._lock:
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        def build_once():
+            # The previous build may have finished since this caller missed.
+            found, value = self._lookup(key)
+            return value if found else self.put(key, build())
+
+        value, shared = self._flight.do(key, build_once)
+        if shared:
+            with self._lock:
+                self.coalesced += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
@@ -0,0 +1,118 @@
+"""Cacheable GET routes for the encoded figures.
+
+    /figures/<version>/circ/<unit>/<template>/<resolution>.json
+    /figures/<version>/trig/<unit>/<symmetries>/<angle>.json
+
+``version`` hashes the figure code and build settings, so a URL always
+names the same bytes and responses can be cached for a long time by
+browsers and shared proxies. Each response has a strong ETag of its body
+and answers ``If-None-Match`` with 304. Requests for another version, or
+for symmetries in another order, are redirected to the canonical URL.
+``symmetries`` is the sorted quadrants joined together, "Q1" for none.
+
+``/figures/plotly-<plotly.py version>.min.js`` serves plotly.py's own plotly.js, which the
+pages load when figures use base64 typed arrays.
+
+With FIGURE_FETCH=1 the pages load their figures from these routes in the
+browser (assets/figure_fetch.js) instead of through callbacks.
+"""
+import hashlib
+import importlib.metadata
+import importlib.util
+import os
+
+import flask
+
+import config
+import metrics
+import trig_bundle
+from figure_store import figure_version
+
+TEMPLATES = ("plotly_white", "plotly_dark")
+
+# plotly.js as bundled with plotly.py, for FIGURE_ARRAY_ENCODING="base64".
+PLOTLYJS_URL = f"/figures/plotly-{importlib.metadata.version('plotly')}.min.js"
+
+def url_templates(prefix="/"):
+    """URL of each page's figure, with ``{field}`` placeholders for its inputs."""
+    base = f"{prefix}figures/{figure_version()}"
+    return {
+        "circ": base + "/circ/{unit}/{template}/{resolution}.json",
+        "trig": base + "/trig/{unit}/{symmetries}/{angle}.json",
+    }
+
+
+def _parse_symmetries(text):
+    if text == "Q1":
+        return ()
+    quadrants = [text[i:i + 2] for i in range(0, len(text), 2)]
+    if len(set(quadrants)) != len(quadrants) or not set(quadrants) <= {"Q2", "Q3", "Q4"}:
+        flask.abort(404)
+    return tuple(quadrants)
+
+
+def _figure_response(payload):
+    response = flask.Response(payload, mimetype="application/json")
+    response.set_etag(hashlib.sha1(payload).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = config.FIGURE_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(flask.request)
+
+
+def _canonical(version, path):
+    """Redirect to ``path`` when the request asked for another version or spelling of it."""
+    if version != figure_version() or flask.request.path != path:
+        response = flask.redirect(flask.request.script_root + path)
+        response.cache_control.no_cache = True
+        return response
+    return None
+
+
+def _plotlyjs_path():
+    # plotly.py's copy of plotly.js, found without importing plotly.
+    package = importlib.util.find_spec("plotly").submodule_search_locations[0]
+    return os.path.join(package, "package_data", "plotly.min.js")
+
+
+def init_app(server):
+    @server.route(PLOTLYJS_URL)
+    def _plotlyjs():
+        response = flask.send_file(_plotlyjs_path(), mimetype="text/javascript", max_age=config.FIGURE_MAX_AGE)
+        response.cache_control.public = True
+        return response
+
+    @server.route("/figures/<version>/circ/<unit>/<template>/<resolution>.json")
+    @metrics.instrument("circ_figure_route")
+    def _circ_figure(version, unit, template, resolution):
+        from circ_func_defs_plot import RESOLUTIONS, get_circular_function_figure, payload_store
+
+        if unit not in trig_bundle.UNITS or template not in TEMPLATES or resolution not in RESOLUTIONS:
+            flask.abort(404)
+        path = url_templates()["circ"].format(unit=unit, template=template, resolution=resolution)
+        redirect = _canonical(version, path)
+        if redirect is not None:
+            return redirect
+        payload = payload_store.get_or_serialize(
+            (unit, template, resolution),
+            lambda: get_circular_function_figure(unit=unit, plot_template=template, resolution=resolution),
+        )
+        return _figure_response(bytes(payload))
+
+    @server.route("/figures/<version>/trig/<unit>/<symmetries>/<int:angle>.json")
+    @metrics.instrument("trig_figure_route")
+    def _trig_figure(version, unit, symmetries, angle):
+        from trig_connection_plot import get_trig_connection_figure, payload_store
+
+        symmetries = _parse_symmetries(symmetries)
+        if unit not in trig_bundle.UNITS or angle not in trig_bundle.SLIDER_ANGLES:
+            flask.abort(404)
+        symmetries = tuple(sorted(symmetries))
+        path = url_templates()["trig"].format(unit=unit, symmetries="".join(symmetries) or "Q1", angle=angle)
+        redirect = _canonical(version, path)
+        if redirect is not None:
+            return redirect
+        payload = payload_store.get_or_serialize(
+            (unit, symmetries, angle), lambda: get_trig_connection_figure(unit, symmetries, angle)
+        )
+        return _figure_response(bytes(payload))
@@ -0,0 +1,119 @@
+"""Pre-serialized figure payloads that callbacks can return without re-encoding.
+
+A callback returns ``store.ref(key, build)`` in place of a figure. The ref
+is a short placeholder string; once Dash has encoded the (now tiny)
+callback response, the ``after_request`` hook installed by ``init_app``
+splices the stored JSON bytes in where the placeholder was. The figure is
+therefore encoded once per variant instead of once per request.
+"""
+import functools
+import hashlib
+import importlib.metadata
+import json
+import os
+
+import flask
+
+import config
+import metrics
+from figure_cache import FigureCache
+
+PLACEHOLDER_PREFIX = "__figure_payload__:"
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose code decides the figure bytes.
+FIGURE_SOURCES = ("circ_func_defs_plot.py", "trig_connection_plot.py", "fast_figure.py", "geometry.py", "angle_format.py")
+
+
+@functools.lru_cache(maxsize=None)
+def figure_version():
+    """Short hash of the figure code, plotly version and build settings."""
+    digest = hashlib.sha1()
+    for name in FIGURE_SOURCES:
+        with open(os.path.join(ROOT, name), "rb") as f:
+            digest.update(f.read())
+    settings = (
+        importlib.metadata.version("plotly"), config.CIRC_FRAME_MODE, config.CIRC_KEYFRAME_STEP,
+        config.CURVE_TOLERANCE_PX, config.RENDER_MODE, config.FIGURE_VALIDATE, config.TRIG_TRACE_LAYOUT,
+        config.FIGURE_ARRAY_ENCODING, config.FIGURE_ARRAY_DTYPE,
+    )
+    digest.update(repr(settings).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def serialize_figure(fig):
+    from plotly.io.json import to_json_plotly
+
+    with metrics.phase("serialize"):
+        if config.FIGURE_ARRAY_ENCODING == "base64":
+            from fast_figure import encode_arrays
+
+            fig = encode_arrays(fig, config.FIGURE_ARRAY_DTYPE)
+        return to_json_plotly(fig).encode("utf-8")
+
+
+def payload_cache(name, max_entries, max_bytes):
+    """Cache for a store's payloads: on disk under
+    ``FIGURE_CACHE_DIR/name/<figure_version()>`` when that is configured, so
+    every worker shares it, else in memory. A new figure version starts an
+    empty directory rather than serving bytes built by other code."""
+    if config.FIGURE_CACHE_DIR is None:
+        return FigureCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=len)
+    from shared_cache import DiskCache
+
+    return DiskCache(
+        os.path.join(config.FIGURE_CACHE_DIR, name, figure_version()), max_entries=max_entries, max_bytes=max_bytes
+    )
+
+
+class FigurePayloadStore:
+    """Encoded figures by key.
+
+    ``preloaded`` is an optional ``key -> bytes or None`` lookup, such as
+    an offline bundle, consulted before the in-memory cache.
+    """
+    def __init__(self, max_entries=16, max_bytes=None, cache=None, preloaded=None):
+        self.cache = cache if cache is not None else FigureCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=len)
+        self.preloaded = preloaded
+
+    def get_or_serialize(self, key, build):
+        """Return the encoded figure for ``key``, calling ``build`` on a miss."""
+        if self.preloaded is not None:
+            payload = self.preloaded(key)
+            if payload is not None:
+                return payload
+        return self.cache.get_or_build(key, lambda: serialize_figure(build()))
+
+    def ref(self, key, build):
+        """Placeholder for the figure under ``key``, resolved after encoding.
+
+        Outside a request there is nothing to splice into, so the decoded
+        figure is returned instead.
+        """
+        payload = self.get_or_serialize(key, build)
+        if not flask.has_request_context():
+            return json.loads(payload)
+        token = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        pending = flask.g.setdefault("figure_payloads", {})
+        pending[token] = payload
+        return PLACEHOLDER_PREFIX + token
+
+    def stats(self):
+        return self.cache.stats()
+
+
+def resolve_payloads(body, payloads):
+    for token, payload in payloads.items():
+        body = body.replace(f'"{PLACEHOLDER_PREFIX}{token}"'.encode("utf-8"), payload)
+    return body
+
+
+def init_app(server):
+    @server.after_request
+    def _splice_figure_payloads(response):
+        payloads = flask.g.pop("figure_payloads", None)
+        if payloads and not response.direct_passthrough:
+            with metrics.phase("splice"):
+                response.set_data(resolve_payloads(response.get_data(), payloads))
+        return response
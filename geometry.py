@@ -0,0 +1,74 @@
+"""Sample counts for circles, arcs and curves from an on-screen tolerance.
+
+A chord spanning an angle ``step`` of a circle of radius ``r`` strays at
+most ``r * (1 - cos(step / 2))`` (the sagitta) from the arc, and a chord of
+a curve with ``|f''| <= k`` over an interval ``h`` strays at most
+``k * h**2 / 8``. Keeping those errors under a fraction of a pixel gives
+small arcs a handful of points and a full circle a few dozen, with no
+visible change.
+
+``tolerance`` is in data units; ``tolerance_px`` converts a pixel budget
+using the axis scale. A tolerance of 0 keeps the fixed sample counts the
+figures were designed with.
+"""
+import math
+
+import numpy as np
+
+
+def axis_scale(figure_px, margin_px, domain, data_range):
+    """Screen pixels per data unit along one axis."""
+    plot_px = (figure_px - margin_px) * (domain[1] - domain[0])
+    return plot_px / (data_range[1] - data_range[0])
+
+
+def tolerance_px(pixels, scale):
+    """``pixels`` screen pixels in data units, for an axis with ``scale`` pixels per unit."""
+    return pixels / scale if pixels else 0
+
+
+def arc_samples(radius, sweep, tolerance, fixed):
+    """Points for an arc of ``sweep`` radians at ``radius``; ``fixed`` when ``tolerance`` is 0."""
+    if not tolerance:
+        return fixed
+    radius, sweep = abs(radius), abs(sweep)
+    if tolerance >= radius or sweep == 0:
+        return 2
+    step = 2 * math.acos(1 - tolerance / radius)
+    return max(2, math.ceil(sweep / step) + 1)
+
+
+def arc_sample_counts(radius, sweeps, tolerance, fixed):
+    """``arc_samples`` for an array of sweeps at one radius."""
+    sweeps = np.abs(np.asarray(sweeps, dtype=float))
+    if not tolerance:
+        return np.full(len(sweeps), fixed)
+    if tolerance >= abs(radius):
+        return np.full(len(sweeps), 2)
+    step = 2 * math.acos(1 - tolerance / abs(radius))
+    return np.maximum(2, np.ceil(sweeps / step).astype(int) + 1)
+
+
+def curve_samples(span, curvature, tolerance, fixed):
+    """Evenly spaced points for a curve over ``span`` whose ``|f''|`` stays below ``curvature``."""
+    if not tolerance:
+        return fixed
+    step = math.sqrt(8 * tolerance / curvature)
+    return max(2, math.ceil(span / step) + 1)
+
+
+def ragged_arcs(radius, sweeps, counts):
+    """Arcs from angle 0 to each of ``sweeps``, ``counts[i]`` points each, in one pass.
+
+    Returns flat x and y arrays and the index at which each arc starts.
+    Each arc is sampled exactly like ``np.linspace(0, sweep, count)``.
+    """
+    sweeps = np.asarray(sweeps, dtype=float)
+    counts = np.asarray(counts)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    owner = np.repeat(np.arange(len(counts)), counts)
+    position = np.arange(ends[-1]) - starts[owner]
+    theta = position * (sweeps / np.maximum(counts - 1, 1))[owner]
+    theta[ends - 1] = sweeps
+    return radius * np.cos(theta), radius * np.sin(theta), starts
@@ -0,0 +1,204 @@
+"""Prometheus-style metrics for the figure callbacks, served at /metrics.
+
+Callbacks wrapped with ``instrument`` get a request counter and latency
+histograms split into a ``build`` phase (the callback body), a
+``serialize`` phase (figure encoding inside the callback plus Dash's own
+response encoding), and the ``splice`` and ``compress`` phases of the
+figure_store and compression hooks that run on the response afterwards.
+Response sizes are recorded once the response is final, and registered
+figure caches report their hit/miss statistics.
+
+Metrics live in the process that records them. With CIRC_BACKGROUND=1
+the Definitions callback runs in a background job process, so its
+callback metrics and the figure caches it fills there do not appear in
+the web server's /metrics.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+import flask
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 3e5, 1e6, 3e6, 1e7, 3e7, 1e8)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, series["buckets"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', f'{bound:g}'),))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+callback_requests = Counter("callback_requests_total", "Callback invocations.")
+callback_phase_seconds = Histogram("callback_phase_seconds", "Callback latency by phase (build, serialize, splice, compress).", LATENCY_BUCKETS)
+callback_response_bytes = Histogram("callback_response_bytes", "Size of callback responses sent to the browser.", SIZE_BUCKETS)
+
+_metrics = [callback_requests, callback_phase_seconds, callback_response_bytes]
+_caches = {}
+
+CACHE_STATS = (
+    ("hits", "counter", "Cache lookups that found an entry."),
+    ("misses", "counter", "Cache lookups that had to build."),
+    ("coalesced", "counter", "Lookups that waited for a concurrent build of the same entry instead of building."),
+    ("evictions", "counter", "Entries evicted to respect the size or byte budget."),
+    ("entries", "gauge", "Entries currently held."),
+    ("bytes", "gauge", "Approximate bytes currently held."),
+)
+
+
+def register(metric):
+    """Include ``metric`` (anything with ``render()``) in /metrics."""
+    _metrics.append(metric)
+
+
+def register_cache(name, cache):
+    """Report ``cache.stats()`` under ``cache="<name>"``."""
+    _caches[name] = cache
+
+
+def _render_caches():
+    lines = []
+    stats = {name: cache.stats() for name, cache in sorted(_caches.items())}
+    for stat, kind, help in CACHE_STATS:
+        metric = f"figure_cache_{stat}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {metric} {help}", f"# TYPE {metric} {kind}"]
+        for name, values in stats.items():
+            if stat in values:
+                lines.append(f'{metric}{{cache="{name}"}} {values[stat]}')
+    return lines
+
+
+def render():
+    lines = []
+    for metric in _metrics:
+        lines += metric.render()
+    lines += _render_caches()
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def phase(name):
+    """Attribute the enclosed time to phase ``name`` of the current callback."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if flask.has_request_context():
+            phases = flask.g.setdefault("metrics_phases", {})
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def instrument(name):
+    """Record request count and phase latencies for callback ``name``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            callback_requests.inc(callback=name)
+            if not flask.has_request_context():
+                return func(*args, **kwargs)
+            flask.g.metrics_callback = name
+            flask.g.metrics_phases = {}
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                phases = flask.g.metrics_phases
+                phases["build"] = end - start - phases.get("serialize", 0.0)
+                flask.g.metrics_callback_end = end
+        return wrapper
+    return decorator
+
+
+def init_app(server):
+    @server.route("/metrics")
+    def _metrics_endpoint():
+        return flask.Response(render(), mimetype="text/plain; version=0.0.4")
+
+    @server.after_request
+    def _record_callback_metrics(response):
+        name = flask.g.pop("metrics_callback", None)
+        if name is None:
+            return response
+        phases = flask.g.pop("metrics_phases", {})
+        # Dash encodes the callback's return value after the callback exits;
+        # the hooks that ran since then report their own phases.
+        after_callback = time.perf_counter() - flask.g.pop("metrics_callback_end")
+        hooks = phases.get("splice", 0.0) + phases.get("compress", 0.0)
+        phases["serialize"] = phases.get("serialize", 0.0) + after_callback - hooks
+        for phase_name, seconds in phases.items():
+            callback_phase_seconds.observe(seconds, callback=name, phase=phase_name)
+        if not response.direct_passthrough:
+            callback_response_bytes.observe(len(response.get_data()), callback=name)
+        return response
@@ -1,140 +1,3 @@
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
-import numpy as np
-from fractions import Fraction
-
-
-# Global cache for last used unit to persist between animations
-_last_unit = {"value": "degrees"}
-
-def format_angle_label(angle_deg, unit="degrees"):
-    if unit == "degrees":
-        return f"θ = {angle_deg}°"
-    else:
-        frac = Fraction(angle_deg, 180).limit_denominator(12)
-        if frac.numerator == 0:
-            return "θ = 0"
-        elif frac == 1:
-            return "θ = π"
-        elif frac.denominator == 1:
-            return f"θ = {frac.numerator}π"
-        else:
-            return f"θ = {frac.numerator}π/{frac.denominator}"
-
-def format_slider_ticks(degrees_list, unit):
-    return [format_angle_label(deg, unit).replace("θ = ", "") for deg in degrees_list]
-
-def angle_deg_to_unit(angle_deg, unit):
-    return angle_deg if unit == "degrees" else np.radians(angle_deg)
-
-def get_axis_tickvals(unit):
-    if unit == "degrees":
-        return list(range(0, 361, 30)), list(map(str, range(0, 361, 30)))
-    else:
-        degs = list(range(0, 361, 30))
-        vals = [round(np.radians(d), 6) for d in degs]
-        labels = [format_angle_label(d, "radians").replace("θ = ", "") for d in degs]
-        return vals, labels
-
-def create_circular_function_figure(unit="degrees", plot_template="plotly_white"):
-    _last_unit["value"] = unit  # persist current unit to avoid reset on animation end
-
-    theta = np.linspace(0, 2 * np.pi, 500)
-    circle_x = np.cos(theta)
-    circle_y = np.sin(theta)
-
-    angle_degrees = np.arange(0, 361, 1)
-    angle_units = np.array([angle_deg_to_unit(deg, unit) for deg in angle_degrees])
-    angle_radians = np.radians(angle_degrees)
-    cos_vals = np.cos(angle_radians)
-    sin_vals = np.sin(angle_radians)
-
-    tick_angles = [15*i for i in range(0,25)]
-    tick_labels = format_slider_ticks(tick_angles, unit)
-
-    fig = make_subplots(
-        rows=2, cols=2,
-        specs=[[{"rowspan": 2}, {}], [None, {}]],
-        column_widths=[0.6, 0.4],
-        horizontal_spacing=0.1,
-        vertical_spacing=0.3,
-        subplot_titles=("Unit Circle", "cos(θ)", "sin(θ)")
-    )
-
-    frames = []
-    for deg, angle_val, cos_val, sin_val in zip(angle_degrees, angle_units, cos_vals, sin_vals):
-        label = format_angle_label(deg, unit)
-        rad = np.radians(deg)
-        arc_theta = np.linspace(0, rad, 100)
-        arc_x = 0.3 * np.cos(arc_theta)
-        arc_y = 0.3 * np.sin(arc_theta)
-        label_r = 0.6
-        label_x = label_r * np.cos(rad / 2)
-        label_y = label_r * np.sin(rad / 2)
-
-        frames.append(go.Frame(
-            name=str(deg),
-            data=[
-                go.Scatter(x=circle_x, y=circle_y, mode="lines", line=dict(color="black"), showlegend=False, xaxis="x1", yaxis="y1"),
-                go.Scatter(x=angle_units, y=cos_vals, mode="lines", line=dict(color="blue"), showlegend=False, xaxis="x2", yaxis="y2"),
-                go.Scatter(x=angle_units, y=sin_vals, mode="lines", line=dict(color="red"), showlegend=False, xaxis="x3", yaxis="y3"),
-                go.Scatter(x=[0] + list(arc_x) + [0], y=[0] + list(arc_y) + [0], fill='toself', fillcolor='rgba(0,100,255,0.2)', line=dict(color='rgba(0,0,0,0)'), mode='lines', showlegend=False, xaxis="x1", yaxis="y1"),
-                go.Scatter(x=[0, np.cos(rad)], y=[0, np.sin(rad)], mode='lines+markers', line=dict(color='green'), showlegend=False, xaxis="x1", yaxis="y1"),
-                go.Scatter(x=[np.cos(rad)], y=[np.sin(rad)], mode='markers+text', text=[f"(<span style='color:blue'>{cos_val:.2f}</span>, <span style='color:red'>{sin_val:.2f}</span>)"], textposition='top right', textfont=dict(size=14), marker=dict(color='black', size=8), showlegend=False, xaxis="x1", yaxis="y1", hoverinfo="skip", texttemplate="%{text}"),
-                go.Scatter(x=arc_x, y=arc_y, mode='lines', line=dict(color='green', dash='dash'), showlegend=False, xaxis="x1", yaxis="y1"),
-                go.Scatter(x=[label_x], y=[label_y], mode='text', text=[label], textfont=dict(size=14, color='darkblue'), showlegend=False, xaxis="x1", yaxis="y1"),
-                go.Scatter(x=[angle_val], y=[cos_val], mode='markers+text', text=[f"{cos_val:.2f}"], textposition="top center", marker=dict(color='blue', size=10), showlegend=False, xaxis="x2", yaxis="y2"),
-                go.Scatter(x=[angle_val], y=[sin_val], mode='markers+text', text=[f"{sin_val:.2f}"], textposition="top center", marker=dict(color='red', size=10), showlegend=False, xaxis="x3", yaxis="y3")
-            ]
-        ))
-
-    fig.frames = frames 
-    fig.add_traces(frames[0].data)
-
-    x_title = "θ (degrees)" if unit == "degrees" else "θ (radians)"
-    x_range = [0, 385] if unit == "degrees" else [0, 2.1 * np.pi]
-    tickvals, ticktext = get_axis_tickvals(unit)
-
-    fig.update_layout(
-        template=plot_template,
-        width=1200,
-        height=750,
-        margin=dict(t=100, b=80),
-        xaxis=dict(domain=[0, 0.55], range=[-1.5, 1.5], scaleanchor='y'),
-        yaxis=dict(domain=[0, 1], range=[-1.5, 1.5]),
-        xaxis2=dict(domain=[0.65, 1], anchor='y2', title=x_title, range=x_range, tickvals=tickvals, ticktext=ticktext, title_standoff=20, tickangle=-45),
-        yaxis2=dict(domain=[0.6, 1], range=[-1.3, 1.3]),
-        xaxis3=dict(domain=[0.65, 1], anchor='y3', title=x_title, range=x_range, tickvals=tickvals, ticktext=ticktext, title_standoff=20, tickangle=-45),
-        yaxis3=dict(domain=[0, 0.35], range=[-1.3, 1.3]),
-        sliders=[{
-            "steps": [{
-                "label": label,
-                "method": "animate",
-                "args": [[str(deg)], {"mode": "immediate", "frame": {"duration": 0, "redraw": True}}],
-            } for deg, label in zip(tick_angles, tick_labels)],
-            "transition": {"duration": 0},
-            "x": 0.05,
-            "y": -0.07,
-            "len": 0.9
-        }],
-        updatemenus=[{
-            "type": "buttons",
-            "showactive": False,
-            "buttons": [
-                {"label": "Play", "method": "animate", "args": [None, {"frame": {"duration": 30, "redraw": True}, "fromcurrent": True}]},
-                {"label": "Pause", "method": "animate", "args": [[None], {"mode": "immediate"}]}
-            ],
-            "x": 0.03,
-            "y": -0.08
-        }]
-    )
-
-    return fig
-
-
-
-
-
 # from plotly.subplots import make_subplots
 # import plotly.graph_objects as go
 # import numpy as np
@@ -430,11 +293,19 @@ def create_circular_function_figure(unit="degrees", plot_template="plotly_white"
 
 
 
+import json
+
 import dash
-from dash import html, dcc, callback, Output, Input
+import dash_bootstrap_components as dbc
+from dash import html, dcc, callback, clientside_callback, ClientsideFunction, ctx, Output, Input, State
+
+import config
+import metrics
+
 dash.register_page(__name__, path="/circ_func_defs", name="Circular Function Definitions")
 
-# from circ_func_defs_plot import create_circular_function_figure  # if using a separate file
+# The figure code lives in circ_func_defs_plot and is imported on first use,
+# so starting the app does not pay for plotly and numpy.
 
 layout = html.Div([
     dcc.Store(id="theme-store", storage_type="session"),
@@ -450,21 +321,95 @@ layout = html.Div([
             ],
             value="degrees",
             labelStyle={"display": "inline-block", "marginRight": "1rem"}
+        ),
+        html.Label("Animation:", style={"marginLeft": "1rem", "marginRight": "0.5rem"}),
+        dcc.RadioItems(
+            id="angle-resolution-toggle",
+            options=[
+                {"label": "1° frames", "value": "full"},
+                {"label": f"{config.CIRC_KEYFRAME_STEP}° keyframes", "value": "keyframes"}
+            ],
+            value=config.CIRC_RESOLUTION,
+            persistence=True,
+            persistence_type="session",
+            inline=True,
+            labelStyle={"marginRight": "1rem"}
         )
     ], style={"marginBottom": "1rem"}),
 
+    # Shown while a background build of the figure is running.
+    html.Div(
+        [dbc.Spinner(size="sm"), html.Span(" Building figure…")],
+        id="circ-build-progress",
+        style={"display": "none"}
+    ),
+
     html.Div(id="unit-circle-content")
 ])
 
+if config.FIGURE_FETCH:
+    from figure_routes import url_templates
+
+    # The browser fetches the figure from its GET route (assets/figure_fetch.js).
+    layout.children[-1].children = dcc.Graph(id="circ-func-graph")
+    layout.children.append(dcc.Store(id="circ-figure-url-store", data=url_templates(dash.get_relative_path("/"))["circ"]))
+
+# The session store, not the toggle, is the source of truth for the unit:
+# the toggle is recreated with its default value whenever the page loads.
 @callback(
-    Output("unit-circle-content", "children"),
-    Input("theme-store", "data"),
-    Input("angle-unit-toggle", "value")
+    Output("angle-unit-store", "data"),
+    Output("angle-unit-toggle", "value"),
+    Input("angle-unit-toggle", "value"),
+    Input("angle-unit-store", "data"),
 )
-def render_combined_plot(theme, unit):
+def sync_angle_unit(toggled, stored):
+    if ctx.triggered_id == "angle-unit-toggle":
+        return toggled, dash.no_update
+    return dash.no_update, stored or "degrees"
+
+
+@metrics.instrument("render_combined_plot")
+def render_combined_plot(theme, unit, resolution):
+    from circ_func_defs_plot import get_circular_function_figure, payload_store
+
     template = "plotly_dark" if theme == "dark" else "plotly_white"
-    fig = create_circular_function_figure(unit=unit, plot_template=template)
-    return dcc.Graph(figure=fig)
+    key = (unit, template, resolution)
+    build = lambda: get_circular_function_figure(unit=unit, plot_template=template, resolution=resolution)
+    if config.CIRC_BACKGROUND:
+        # A background job's result is stored by its process and sent by a
+        # later poll request, so there is no response to splice into.
+        return dcc.Graph(figure=json.loads(payload_store.get_or_serialize(key, build)))
+    return dcc.Graph(figure=payload_store.ref(key, build))
+
+
+if config.FIGURE_FETCH:
+    clientside_callback(
+        ClientsideFunction(namespace="figure_fetch", function_name="circ_figure"),
+        Output("circ-func-graph", "figure"),
+        Input("theme-store", "data"),
+        Input("angle-unit-store", "data"),
+        Input("angle-resolution-toggle", "value"),
+        State("circ-figure-url-store", "data")
+    )
+elif config.CIRC_BACKGROUND:
+    # Dash terminates the running job when the inputs change again, so a
+    # burst of toggles only keeps the latest build.
+    callback(
+        Output("unit-circle-content", "children"),
+        Input("theme-store", "data"),
+        Input("angle-unit-store", "data"),
+        Input("angle-resolution-toggle", "value"),
+        background=True,
+        running=[(Output("circ-build-progress", "style"), {"display": "block"}, {"display": "none"})],
+        interval=250
+    )(render_combined_plot)
+else:
+    callback(
+        Output("unit-circle-content", "children"),
+        Input("theme-store", "data"),
+        Input("angle-unit-store", "data"),
+        Input("angle-resolution-toggle", "value")
+    )(render_combined_plot)
 
 
 # import dash
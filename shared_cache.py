@@ -0,0 +1,172 @@
+"""Encoded figures on local disk, shared by every worker process.
+
+Each entry is one file named after a hash of its key. A worker that misses
+takes an exclusive ``flock`` on the entry's lock file before building, so a
+variant is built once however many workers ask for it at the same time;
+the others block on the lock and then read the finished file, a miss
+counted as ``coalesced`` as in ``FigureCache``. The builder removes the
+lock file once it is done. Files are written to a temporary name and
+renamed into place, so readers never see a partial payload. The payloads
+themselves live in the OS page cache rather than in each worker's heap.
+
+``figure_store.payload_cache`` puts each cache in a directory named
+after ``figure_version()``, so a deploy or settings change that alters
+the figures starts from an empty cache instead of serving old bytes.
+Directories of earlier versions are left behind for the operator to remove.
+"""
+import fcntl
+import hashlib
+import os
+import tempfile
+import threading
+
+
+class DiskCache:
+    """``FigureCache``-compatible store of ``bytes`` values under ``directory``.
+
+    Least-recently-written entries are removed once the directory holds more
+    than ``max_entries`` files or ``max_bytes`` bytes.
+    """
+    def __init__(self, directory, max_entries=16, max_bytes=None):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, suffix=".bin"):
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + suffix)
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def __len__(self):
+        return len(self._files())
+
+    def get(self, key, default=None):
+        value = self._read(key)
+        self._count(value is not None)
+        return default if value is None else value
+
+    def put(self, key, value):
+        if self.max_bytes is not None and len(value) > self.max_bytes:
+            return value
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._evict()
+        return value
+
+    def get_or_build(self, key, build):
+        value = self._read(key)
+        if value is not None:
+            self._count(True)
+            return value
+        self._count(False)
+        lock_path = self._path(key, ".lock")
+        with open(lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # Another worker may have built it while we waited.
+                value = self._read(key)
+                if value is not None:
+                    with self._lock:
+                        self.coalesced += 1
+                else:
+                    try:
+                        value = self.put(key, build())
+                    finally:
+                        _unlink_lock(lock, lock_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return value
+
+    def clear(self):
+        for path, _, _ in self._files():
+            _unlink(path)
+
+    def stats(self):
+        files = self._files()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "entries": len(files),
+                "bytes": sum(size for _, size, _ in files),
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _files(self):
+        """``(path, size, mtime)`` of every entry, oldest first."""
+        files = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".bin"):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((entry.path, st.st_size, st.st_mtime))
+        files.sort(key=lambda file: file[2])
+        return files
+
+    def _evict(self):
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        while files and (
+            len(files) > self.max_entries
+            or (self.max_bytes is not None and total > self.max_bytes)
+        ):
+            path, size, _ = files.pop(0)
+            if _unlink(path):
+                with self._lock:
+                    self.evictions += 1
+            total -= size
+
+
+def _unlink_lock(lock, path):
+    """Remove the lock file at ``path`` if it is still the one ``lock`` holds.
+
+    Waiters blocked on the removed file re-read the entry once they get it;
+    a later miss creates a fresh lock file.
+    """
+    try:
+        if os.path.samestat(os.fstat(lock.fileno()), os.stat(path)):
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return False
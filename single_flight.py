@@ -0,0 +1,57 @@
+"""Coalescing of concurrent calls for the same key.
+
+When a class loads a page at once, every request misses the empty figure
+caches together. ``SingleFlight.do`` lets the first caller for a key run
+the build while the others wait for it and share its result (or its
+exception), so each variant is built once per process however many
+requests ask for it. ``FigureCache.get_or_build`` routes its builds
+through one; ``DiskCache`` gets the same effect across processes from
+its file lock.
+"""
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def __len__(self):
+        """Keys with a call in flight."""
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key, fn):
+        """Return ``(fn(), shared)``, joining a call for ``key`` already in flight.
+
+        ``shared`` is True when the result came from another caller's call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+        try:
+            call.value = fn()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
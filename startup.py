@@ -0,0 +1,120 @@
+"""Startup timing: how long a worker takes to import the app and serve.
+
+    python startup.py report [--top N] [--json]
+
+``init_app`` measures, from the moment this module is first imported (the
+top of app.py), the time until the app is ready and until the first
+request has been served. Both are logged and exposed on /metrics.
+
+``report`` starts fresh interpreters with ``-X importtime`` to list the
+slowest modules, then times the first page load and the first figure
+callback of a cold process.
+"""
+import time
+
+STARTED = time.perf_counter()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import logging  # noqa: E402
+import os  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+
+import flask  # noqa: E402
+
+import metrics  # noqa: E402
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+logger = logging.getLogger(__name__)
+
+startup_seconds = metrics.Gauge("app_startup_seconds", "Seconds from process start to milestone (ready, first_request).")
+metrics.register(startup_seconds)
+
+
+def init_app(server):
+    ready = time.perf_counter() - STARTED
+    startup_seconds.set(ready, milestone="ready")
+    logger.info("app ready in %.3fs", ready)
+    served = []
+
+    @server.after_request
+    def _record_first_request(response):
+        if not served:
+            served.append(True)
+            seconds = time.perf_counter() - STARTED
+            startup_seconds.set(seconds, milestone="first_request")
+            logger.info("first request (%s) served %.3fs after start", flask.request.path, seconds)
+        return response
+
+
+_COLD_START = """
+import json, time
+start = time.perf_counter()
+import app
+ready = time.perf_counter()
+client = app.server.test_client()
+assert client.get("/").status_code == 200
+page = time.perf_counter()
+response = client.post("/_dash-update-component", json={
+    "output": "unit-circle-content.children",
+    "outputs": {"id": "unit-circle-content", "property": "children"},
+    "inputs": [{"id": "theme-store", "property": "data", "value": None},
+               {"id": "angle-unit-store", "property": "data", "value": "degrees"},
+               {"id": "angle-resolution-toggle", "property": "value", "value": "full"}],
+    "changedPropIds": [], "state": []})
+assert response.status_code == 200
+figure = time.perf_counter()
+print(json.dumps({"import_app": ready - start, "first_page": page - ready, "first_figure": figure - page}))
+"""
+
+
+def import_times():
+    """Cumulative import time in seconds of each module loaded by ``import app``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def cold_start():
+    """Seconds spent importing app, serving "/", and the first figure callback in a fresh process."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", _COLD_START], cwd=ROOT, capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process_total"] = time.perf_counter() - start
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="print import and first-request timings for a cold start")
+    report.add_argument("--top", type=int, default=25, help="number of modules to list")
+    report.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    modules = sorted(import_times().items(), key=lambda item: item[1], reverse=True)[:args.top]
+    timings = cold_start()
+    if args.json:
+        print(json.dumps({"modules": dict(modules), "cold_start": timings}, indent=2))
+        return 0
+
+    print("slowest imports (cumulative):")
+    for name, seconds in modules:
+        print(f"  {seconds * 1000:9.1f} ms  {name}")
+    print("cold start:")
+    for name, seconds in timings.items():
+        print(f"  {seconds * 1000:9.1f} ms  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
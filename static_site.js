@@ -0,0 +1,141 @@
+// Page controls for the static export (static_site.py). Stands in for the
+// Dash callbacks: each control change loads the precomputed figure for the
+// new inputs and draws it with plotly.js. Figures are cached per path, so
+// revisiting a combination does not fetch it again.
+
+(function () {
+    var site = window.STATIC_SITE;
+    var cache = {};
+
+    function figurePath(template, fields) {
+        return site.base + template.replace(/\{(\w+)\}/g, function (_, name) {
+            return fields[name];
+        });
+    }
+
+    function loadFigure(path) {
+        if (!cache[path]) {
+            cache[path] = fetch(path).then(function (response) {
+                if (!response.ok) {
+                    throw new Error(path + ": " + response.status);
+                }
+                return response.json();
+            });
+        }
+        return cache[path];
+    }
+
+    function draw(div, path) {
+        // A whole figure object carries its frames, which drive the slider
+        // and Play button of the Definitions animation.
+        return loadFigure(path).then(function (fig) {
+            return Plotly.react(div, fig);
+        });
+    }
+
+    function radioValue(name) {
+        var checked = document.querySelector('input[name="' + name + '"]:checked');
+        return checked && checked.value;
+    }
+
+    function setRadio(name, value) {
+        var input = document.querySelector('input[name="' + name + '"][value="' + value + '"]');
+        if (input) {
+            input.checked = true;
+        }
+    }
+
+    function checkedValues(name) {
+        var inputs = document.querySelectorAll('input[name="' + name + '"]:checked');
+        return Array.prototype.map.call(inputs, function (input) {
+            return input.value;
+        });
+    }
+
+    // dcc.Store(storage_type="session") keeps its data JSON-encoded under its id.
+    function sessionGet(key) {
+        try {
+            return JSON.parse(window.sessionStorage.getItem(key));
+        } catch (e) {
+            return null;
+        }
+    }
+
+    function sessionSet(key, value) {
+        try {
+            window.sessionStorage.setItem(key, JSON.stringify(value));
+        } catch (e) {
+            // Storage may be disabled; the controls still work for this page.
+        }
+    }
+
+    function onChange(selector, handler) {
+        Array.prototype.forEach.call(document.querySelectorAll(selector), function (input) {
+            input.addEventListener("change", handler);
+        });
+    }
+
+    function circFuncDefs() {
+        var content = document.getElementById("unit-circle-content");
+        var graph = document.createElement("div");
+        content.appendChild(graph);
+
+        var unit = sessionGet("angle-unit-store");
+        if (unit) {
+            setRadio("angle-unit-toggle", unit);
+        }
+        var resolution = sessionGet("angle-resolution-toggle");
+        if (resolution) {
+            setRadio("angle-resolution-toggle", resolution);
+        }
+
+        function update() {
+            var unit = radioValue("angle-unit-toggle");
+            var resolution = radioValue("angle-resolution-toggle");
+            sessionSet("angle-unit-store", unit);
+            sessionSet("angle-resolution-toggle", resolution);
+            draw(graph, figurePath(site.figures.circ, {
+                unit: unit,
+                template: sessionGet("theme-store") === "dark" ? "plotly_dark" : "plotly_white",
+                resolution: resolution
+            }));
+        }
+
+        onChange('input[name="angle-unit-toggle"], input[name="angle-resolution-toggle"]', update);
+        update();
+    }
+
+    function trigConnection() {
+        var graph = document.getElementById("trig-connection-graph");
+        var slider = document.querySelector("#angle-slider input");
+        var output = document.querySelector("#angle-slider output");
+
+        function update() {
+            output.textContent = slider.value;
+            draw(graph, figurePath(site.figures.trig, {
+                unit: radioValue("trig-angle-unit-toggle"),
+                symmetries: checkedValues("symmetry-toggle").sort().join("") || "Q1",
+                angle: slider.value
+            }));
+        }
+
+        slider.addEventListener("input", update);
+        onChange('input[name="trig-angle-unit-toggle"], input[name="symmetry-toggle"]', update);
+        update();
+    }
+
+    // dbc.NavLink(active="exact") highlights the link of the current page.
+    Array.prototype.forEach.call(document.querySelectorAll("a.nav-link[data-path]"), function (link) {
+        if (link.getAttribute("data-path") === site.page) {
+            link.classList.add("active");
+        }
+    });
+
+    var pages = {
+        "/circ_func_defs": circFuncDefs,
+        "/trig_connection": trigConnection
+    };
+    if (pages[site.page]) {
+        pages[site.page]();
+    }
+})();
@@ -0,0 +1,262 @@
+"""Export the whole app as a static site for a plain file server or CDN.
+
+    python static_site.py export [--out DIR] [--base-path /]
+
+Every registered page is rendered inside the app's sidebar layout to
+``<path>/index.html``. Every figure variant a page can show is written
+as JSON next to it: the Definitions figure for each unit, template and
+animation resolution, and the Trig & Circle figure for every point of
+its input grid. static_site.js wires the page controls to those files
+and draws them with plotly.js, so animation frames, the slider and the
+unit and symmetry toggles work without a Python server.
+
+Only the components the pages use are translated to static HTML:
+``dash.html``, the dbc layout components and a handful of dcc controls.
+"""
+import argparse
+import html as html_lib
+import json
+import os
+import re
+import sys
+import time
+
+import dash
+
+import app
+import trig_bundle
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES = ("plotly_white", "plotly_dark")
+
+# Where each figure variant is written; static_site.js fills in the same fields.
+CIRC_FIGURE = "figures/circ/{unit}-{template}-{resolution}.json"
+TRIG_FIGURE = "figures/trig/{unit}/{symmetries}/{angle}.json"
+
+# HTML elements without a closing tag.
+VOID_TAGS = {"br", "hr", "img", "input", "wbr"}
+
+# CSS properties React leaves unitless; other numbers are pixels.
+UNITLESS = {"flex", "flexGrow", "flexShrink", "opacity", "order", "zIndex", "fontWeight", "lineHeight"}
+
+
+# --- Components -------------------------------------------------------------
+
+def _css(style):
+    rules = []
+    for name, value in (style or {}).items():
+        if isinstance(value, (int, float)) and name not in UNITLESS:
+            value = f"{value}px"
+        name = re.sub("([A-Z])", r"-\1", name).lower()
+        rules.append(f"{name}: {value}")
+    return "; ".join(rules)
+
+
+def _attrs(**attrs):
+    parts = []
+    for name, value in attrs.items():
+        if value is None or value is False:
+            continue
+        name = name.rstrip("_").replace("_", "-")
+        parts.append(name if value is True else f'{name}="{html_lib.escape(str(value))}"')
+    return "".join(" " + part for part in parts)
+
+
+def _markdown(text):
+    """The subset of Markdown the pages use: paragraphs, bullet lists and emphasis."""
+    def inline(line):
+        line = html_lib.escape(line)
+        line = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", line)
+        return re.sub(r"\*(.+?)\*", r"<em>\1</em>", line)
+
+    blocks = []
+    for block in re.split(r"\n\s*\n", text.strip()):
+        lines = [line.strip() for line in block.strip().splitlines()]
+        if all(line.startswith(("- ", "* ")) for line in lines):
+            blocks.append("<ul>" + "".join(f"<li>{inline(line[2:])}</li>" for line in lines) + "</ul>")
+        else:
+            # A paragraph may run straight into a list.
+            paragraph = [line for line in lines if not line.startswith(("- ", "* "))]
+            items = [line for line in lines if line.startswith(("- ", "* "))]
+            blocks.append(f"<p>{inline(' '.join(paragraph))}</p>")
+            if items:
+                blocks.append("<ul>" + "".join(f"<li>{inline(line[2:])}</li>" for line in items) + "</ul>")
+    return "\n".join(blocks)
+
+
+def _options(component, input_type, checked):
+    label_style = _css(getattr(component, "labelStyle", None))
+    block = not getattr(component, "inline", False) and not label_style
+    items = []
+    for option in component.options:
+        value = option["value"]
+        items.append(
+            f'<label{_attrs(style=label_style or None)}>'
+            f'<input{_attrs(type=input_type, name=component.id, value=value, checked=value in checked)}> '
+            f'{html_lib.escape(str(option["label"]))}</label>' + ("<br>" if block else " ")
+        )
+    return f'<div{_attrs(id=component.id, data_control=input_type)}>{"".join(items)}</div>'
+
+
+def render(component, page_content=""):
+    """Static HTML for a Dash component tree."""
+    if component is None:
+        return ""
+    if isinstance(component, (list, tuple)):
+        return "".join(render(child, page_content) for child in component)
+    if isinstance(component, (str, int, float)):
+        return html_lib.escape(str(component))
+    if component is dash.page_container:
+        return page_content
+
+    namespace, kind = component._namespace, component._type
+    children = render(getattr(component, "children", None), page_content)
+    common = dict(id=getattr(component, "id", None), style=_css(getattr(component, "style", None)) or None)
+
+    if namespace == "dash_html_components":
+        tag = kind.lower()
+        start = f"<{tag}{_attrs(class_=getattr(component, 'className', None), href=getattr(component, 'href', None), **common)}>"
+        return start if tag in VOID_TAGS else f"{start}{children}</{tag}>"
+
+    if namespace == "dash_bootstrap_components":
+        if kind == "Container":
+            classes = "container-fluid" if getattr(component, "fluid", False) else "container"
+        elif kind == "Row":
+            classes = "row"
+        elif kind == "Col":
+            classes = f"col-{component.width}" if getattr(component, "width", None) else "col"
+        elif kind == "Nav":
+            classes = "nav" + (" flex-column" if getattr(component, "vertical", False) else "") + (" nav-pills" if getattr(component, "pills", False) else "")
+            return f"<nav{_attrs(class_=classes, **common)}>{children}</nav>"
+        elif kind == "NavLink":
+            return f'<a{_attrs(class_="nav-link", href=component.href, data_path=component.href, **common)}>{children}</a>'
+        else:
+            classes = None
+        classes = " ".join(c for c in (classes, getattr(component, "className", None)) if c)
+        return f"<div{_attrs(class_=classes or None, **common)}>{children}</div>"
+
+    if namespace == "dash_core_components":
+        if kind in ("Store", "Location"):
+            return ""
+        if kind == "Markdown":
+            text = component.children if isinstance(component.children, str) else "\n".join(component.children)
+            return f"<div{_attrs(**common)}>{_markdown(text)}</div>"
+        if kind == "RadioItems":
+            return _options(component, "radio", [component.value])
+        if kind == "Checklist":
+            return _options(component, "checkbox", component.value or [])
+        if kind == "Slider":
+            slider = _attrs(type="range", min=component.min, max=component.max, step=component.step,
+                            value=component.value, style="width: 100%")
+            return (f'<div{_attrs(id=component.id, data_control="range")}><input{slider}>'
+                    f'<output>{component.value}</output></div>')
+        if kind == "Graph":
+            return f'<div{_attrs(id=component.id, data_graph=True, style=common["style"])}></div>'
+
+    # Anything else keeps its children in place.
+    return f"<div{_attrs(**common)}>{children}</div>"
+
+
+# --- Pages ------------------------------------------------------------------
+
+def _page_dir(path):
+    return path.strip("/")
+
+
+def page_document(page, base_path, site):
+    layout = page["layout"]() if callable(page["layout"]) else page["layout"]
+    body = render(app.app.layout, page_content=render(layout))
+    # Sidebar links point at the exported directories.
+    body = re.sub(r'href="/([^"]*)"', lambda m: f'href="{base_path}{m.group(1)}{"/" if m.group(1) else ""}"', body)
+    stylesheets = list(app.app.config.external_stylesheets) + [f"{base_path}assets/styles.css"]
+    head = "".join(f'<link rel="stylesheet" href="{html_lib.escape(href)}">' for href in stylesheets)
+    return (
+        "<!DOCTYPE html>\n"
+        f'<html><head><meta charset="utf-8"><title>{html_lib.escape(page["name"])}</title>{head}'
+        f'<script src="{base_path}assets/plotly.min.js"></script></head>\n'
+        f"<body>{body}\n"
+        f"<script>window.STATIC_SITE = {json.dumps(dict(site, base=base_path, page=page['path']))};</script>\n"
+        f'<script src="{base_path}assets/static_site.js"></script></body></html>\n'
+    )
+
+
+# --- Figures ----------------------------------------------------------------
+
+def _write(out, relpath, payload):
+    path = os.path.join(out, relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(payload)
+    return len(payload)
+
+
+def export_circ_figures(out):
+    import circ_func_defs_plot as circ_plot
+
+    size = 0
+    for resolution in circ_plot.RESOLUTIONS:
+        for unit in trig_bundle.UNITS:
+            for template in TEMPLATES:
+                payload = circ_plot.payload_store.get_or_serialize(
+                    (unit, template, resolution),
+                    lambda: circ_plot.get_circular_function_figure(unit=unit, plot_template=template, resolution=resolution),
+                )
+                size += _write(out, CIRC_FIGURE.format(unit=unit, template=template, resolution=resolution), bytes(payload))
+    return size
+
+
+def export_trig_figures(out):
+    import trig_connection_plot as trig_plot
+
+    size = 0
+    for unit, symmetries, angle in trig_bundle.bundle_inputs():
+        payload = trig_plot.payload_store.get_or_serialize(
+            (unit, symmetries, angle), lambda: trig_plot.get_trig_connection_figure(unit, symmetries, angle)
+        )
+        path = TRIG_FIGURE.format(unit=unit, symmetries="".join(symmetries) or "Q1", angle=angle)
+        size += _write(out, path, bytes(payload))
+    return size
+
+
+def export(out, base_path="/"):
+    """Write the static site to ``out``; returns (pages, files, bytes)."""
+    from plotly.offline import get_plotlyjs
+
+    if not base_path.endswith("/"):
+        base_path += "/"
+    os.makedirs(out, exist_ok=True)
+
+    site = {"figures": {"circ": CIRC_FIGURE, "trig": TRIG_FIGURE}}
+    size = _write(out, "assets/plotly.min.js", get_plotlyjs().encode("utf-8"))
+    with open(os.path.join(ROOT, "static_site.js"), "rb") as f:
+        size += _write(out, "assets/static_site.js", f.read())
+    with open(os.path.join(ROOT, "assets", "styles.css"), "rb") as f:
+        size += _write(out, "assets/styles.css", f.read())
+
+    pages = list(dash.page_registry.values())
+    for page in pages:
+        document = page_document(page, base_path, site).encode("utf-8")
+        size += _write(out, os.path.join(_page_dir(page["path"]), "index.html"), document)
+
+    size += export_circ_figures(out)
+    size += export_trig_figures(out)
+    files = sum(len(names) for _, _, names in os.walk(out))
+    return len(pages), files, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_parser = sub.add_parser("export", help="render every page and figure variant to static files")
+    export_parser.add_argument("--out", default=os.path.join(ROOT, "site"))
+    export_parser.add_argument("--base-path", default="/", help="URL path the site is served under")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    pages, files, size = export(args.out, args.base_path)
+    print(f"exported {pages} pages, {files} files ({size / 1e6:.1f} MB) to {args.out} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
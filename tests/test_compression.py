@@ -0,0 +1,64 @@
+"""Conditional requests for compressed figure routes.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+import compression  # noqa: E402
+import figure_routes  # noqa: E402
+
+URL_FIELDS = {
+    "circ": {"unit": "degrees", "template": "plotly_white", "resolution": "keyframes"},
+    "trig": {"unit": "degrees", "symmetries": "Q2", "angle": 30},
+}
+
+
+@pytest.fixture(scope="module")
+def client():
+    client = app.server.test_client()
+    client.get("/")  # registers the page callbacks before any figure request
+    return client
+
+
+def _url(page):
+    return figure_routes.url_templates()[page].format(**URL_FIELDS[page])
+
+
+def _require(encoding):
+    if encoding not in compression.ENCODINGS:
+        pytest.skip(f"{encoding} not available")
+
+
+@pytest.mark.parametrize("page", sorted(URL_FIELDS))
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+def test_not_modified_matches_compressed_response(client, page, encoding):
+    _require(encoding)
+    headers = {"Accept-Encoding": encoding}
+    first = client.get(_url(page), headers=headers)
+    assert first.status_code == 200
+    assert first.headers["Content-Encoding"] == encoding
+    assert first.headers["ETag"].endswith(f'-{encoding}"')
+    assert "Accept-Encoding" in first.headers["Vary"]
+
+    second = client.get(_url(page), headers={**headers, "If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    assert second.data == b""
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert "Accept-Encoding" in second.headers["Vary"]
+
+
+@pytest.mark.parametrize("page", sorted(URL_FIELDS))
+def test_other_encoding_is_not_not_modified(client, page):
+    _require("br")
+    first = client.get(_url(page), headers={"Accept-Encoding": "br"})
+    second = client.get(_url(page), headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["Content-Encoding"] == "gzip"
+    assert second.headers["ETag"].endswith('-gzip"')
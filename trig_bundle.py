@@ -0,0 +1,156 @@
+"""Offline bundle of every Trig & Circle figure.
+
+The page's inputs form a finite grid: 46 slider positions, 2 units and 8
+symmetry subsets, 736 figures in all. ``python trig_bundle.py build``
+renders them across all cores into a single file laid out as::
+
+    MAGIC | uint32 header length | JSON header | figure JSON payloads...
+
+The header records the options the figures were built with (trace
+layout, curve tolerance, render mode, array encoding and
+``figure_version()``, which covers the figure code) and the (offset,
+length) of each payload. A bundle built with other options or code than
+the app's is ignored, so a deploy cannot serve stale figures from an old
+bundle. At startup the page memory-maps the file and ``update_figure``
+serves figures by direct lookup.
+"""
+import argparse
+import itertools
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+
+import config
+import figure_store
+
+MAGIC = b"TRIGBND1"
+SLIDER_ANGLES = range(0, 91, 2)
+UNITS = ("degrees", "radians")
+SYMMETRY_SUBSETS = [
+    subset for r in range(4) for subset in itertools.combinations(("Q2", "Q3", "Q4"), r)
+]
+
+logger = logging.getLogger(__name__)
+
+
+def bundle_key(unit, symmetries, angle):
+    return f"{unit}|{','.join(sorted(symmetries))}|{int(angle)}"
+
+
+def bundle_inputs():
+    return list(itertools.product(UNITS, SYMMETRY_SUBSETS, SLIDER_ANGLES))
+
+
+class FigureBundle:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a figure bundle")
+        (header_len,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(self._mmap[header_start:header_start + header_len])
+        # Options recorded by older bundles default to what those were built with.
+        self.options = {
+            "trace_layout": header["trace_layout"],
+            "curve_tolerance_px": header.get("curve_tolerance_px", 0),
+            "render_mode": header.get("render_mode", "svg"),
+            "array_encoding": header.get("array_encoding", "json"),
+            "array_dtype": header.get("array_dtype", "float64"),
+            # Bundles without one predate it and are never current.
+            "figure_version": header.get("figure_version"),
+        }
+        self._data_start = header_start + header_len
+        self._index = header["entries"]
+
+    def __len__(self):
+        return len(self._index)
+
+    def get(self, unit, symmetries, angle):
+        """Encoded figure JSON for the inputs, or None if not bundled."""
+        entry = self._index.get(bundle_key(unit, symmetries, angle))
+        if entry is None:
+            return None
+        offset, length = entry
+        start = self._data_start + offset
+        return self._mmap[start:start + length]
+
+
+def build_options(trace_layout=config.TRIG_TRACE_LAYOUT):
+    return {
+        "trace_layout": trace_layout,
+        "curve_tolerance_px": config.CURVE_TOLERANCE_PX,
+        "render_mode": config.RENDER_MODE,
+        "array_encoding": config.FIGURE_ARRAY_ENCODING,
+        "array_dtype": config.FIGURE_ARRAY_DTYPE,
+        "figure_version": figure_store.figure_version(),
+    }
+
+
+def load(path=config.TRIG_BUNDLE_PATH, trace_layout=config.TRIG_TRACE_LAYOUT):
+    """Open the bundle at ``path`` if it exists and was built with the app's options."""
+    if not path or not os.path.exists(path):
+        return None
+    bundle = FigureBundle(path)
+    for name, value in build_options(trace_layout).items():
+        if bundle.options[name] != value:
+            logger.warning("ignoring %s: built for %s=%s, app uses %s", path, name, bundle.options[name], value)
+            return None
+    return bundle
+
+
+def _build_payload(args):
+    from trig_connection_plot import create_trig_connection_figure
+
+    (unit, symmetries, angle), trace_layout = args
+    fig = create_trig_connection_figure(
+        unit=unit, symmetries=list(symmetries), current_angle=str(angle), trace_layout=trace_layout
+    )
+    return figure_store.serialize_figure(fig)
+
+
+def build(path=config.TRIG_BUNDLE_PATH, processes=None, trace_layout=config.TRIG_TRACE_LAYOUT):
+    inputs = bundle_inputs()
+    entries = {}
+    chunks = []
+    offset = 0
+    with multiprocessing.Pool(processes) as pool:
+        jobs = pool.imap(_build_payload, [(key, trace_layout) for key in inputs], chunksize=16)
+        for (unit, symmetries, angle), payload in zip(inputs, jobs):
+            entries[bundle_key(unit, symmetries, angle)] = [offset, len(payload)]
+            chunks.append(payload)
+            offset += len(payload)
+
+    header = json.dumps({**build_options(trace_layout), "entries": entries}).encode("utf-8")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+    return len(entries), offset
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="render every figure into a bundle file")
+    build_parser.add_argument("--out", default=config.TRIG_BUNDLE_PATH)
+    build_parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    build_parser.add_argument("--trace-layout", default=config.TRIG_TRACE_LAYOUT, choices=["classic", "consolidated"])
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count, size = build(args.out, processes=args.processes, trace_layout=args.trace_layout)
+    print(f"wrote {count} figures ({size / 1e6:.1f} MB) to {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+import json
+import logging
+
+import numpy as np
+
+import angle_format
+import config
+import geometry
+import metrics
+import trig_bundle
+from fast_figure import scatter, template, finalize, use_webgl
+from figure_cache import FigureCache
+from figure_store import FigurePayloadStore, payload_cache
+
+logger = logging.getLogger(__name__)
+
+
+def format_angle_label(angle_deg, unit="degrees"):
+    if unit == "degrees":
+        return angle_format.degree_label(angle_deg)
+    return angle_format.pi_label(int(angle_deg))
+
+
+QUADRANT_SIGNS = {"Q1": (1, 1), "Q2": (-1, 1), "Q3": (-1, -1), "Q4": (1, -1)}
+
+# Radius factor and colour of the arc from the positive x-axis to each point.
+QUADRANT_ARCS = {"Q1": (1, "green"), "Q2": (1.1, "#000080"), "Q3": (1.3, "#9932CC"), "Q4": (1.5, "#DC143C")}
+
+TICK_DEGREES = sorted(set(range(0, 361, 30)).union(set(range(0, 361, 45))))
+TICK_LABELS = {unit: angle_format.angle_labels(TICK_DEGREES, unit) for unit in ("degrees", "radians")}
+
+# Pixels per data unit; the axes are locked to the same scale, so the
+# narrower of the two plot dimensions decides.
+TRIG_SCALE = min(
+    geometry.axis_scale(800, 80 + 80, (0, 1), (-1.4, 1.4)),
+    geometry.axis_scale(700, 40 + 10, (0, 1), (-1.4, 1.4)),
+)
+
+GREY_QUADRANTS = {
+    "Q2": dict(x0=-1.4, y0=0, x1=0, y1=1.4),
+    "Q3": dict(x0=-1.4, y0=-1.4, x1=0, y1=0),
+    "Q4": dict(x0=0, y0=-1.4, x1=1.4, y1=0),
+}
+
+
+def triangle_geometry(quadrant, angle_deg, unit="degrees", tolerance=0):
+    """Point, arcs and labels of the reference triangle in ``quadrant``.
+
+    Arcs are sampled to within ``tolerance`` data units (0: 100 points each).
+    """
+    sign_x, sign_y = QUADRANT_SIGNS[quadrant]
+    angle_rad = np.radians(angle_deg)
+    x, y = np.cos(angle_rad), np.sin(angle_rad)
+    arc_radius = 0.35 * x  # shrink arc as θ approaches 90°
+    px, py = sign_x * x, sign_y * y
+
+    # Arc + angle label inside the triangle
+    arc_theta = np.linspace(0, angle_rad, geometry.arc_samples(arc_radius, angle_rad, tolerance, 100))
+    angle_arc = (arc_radius * np.cos(arc_theta) * sign_x, arc_radius * np.sin(arc_theta) * sign_y)
+
+    # Arc from the positive x-axis to the full standard angle
+    r_factor, arc_color = QUADRANT_ARCS[quadrant]
+    full_angle = {"Q1": angle_rad, "Q2": np.pi - angle_rad, "Q3": np.pi + angle_rad, "Q4": 2 * np.pi - angle_rad}[quadrant]
+    if quadrant == "Q1":
+        full_arc = angle_arc
+    else:
+        full_theta = np.linspace(0, full_angle, geometry.arc_samples(r_factor*arc_radius, full_angle, tolerance, 100))
+        full_arc = (r_factor*arc_radius * np.cos(full_theta), r_factor*arc_radius * np.sin(full_theta))
+
+    full_deg = round(float(np.degrees(full_angle)))
+    if unit == "degrees":
+        label_full = f"<span style='color:{arc_color}'>{angle_format.degree_label(full_deg)}</span>"
+    else:
+        numerator, denominator = angle_format.fraction_of_pi(full_deg)
+        if numerator == 0:
+            label_full = "0"
+        elif denominator == 1:
+            # Whole turns keep their numerator here: "1π", not "π".
+            label_full = f"<span style='color:{arc_color}'>{numerator}π</span>"
+        else:
+            label_full = f"<span style='color:{arc_color}'>{numerator}π/{denominator}</span>"
+
+    return dict(
+        point=(px, py),
+        point_text=f"(<span style='color:blue'>{px:.2f}</span>, <span style='color:red'>{py:.2f}</span>)",
+        angle_arc=angle_arc,
+        angle_label=format_angle_label(angle_deg, unit),
+        angle_label_pos=(arc_radius * 0.75 * np.cos(angle_rad / 2) * sign_x, arc_radius * 0.75 * np.sin(angle_rad / 2) * sign_y),
+        full_arc=full_arc,
+        arc_color=arc_color,
+        full_label=label_full,
+        full_label_pos=(arc_radius*r_factor * 1.2 * np.cos(full_angle - (angle_rad/2)), arc_radius*r_factor * 1.2 * np.sin(full_angle - (angle_rad/2))),
+        side_labels=[
+            (px/2, -0.05, f"<span style='color:blue'>A = {abs(x):.2f}</span>"),
+            (px + 0.05, py/2, f"<span style='color:red'>O = {abs(y):.2f}</span>"),
+            (px/2 - 0.05, py/2 + 0.05, "1"),
+        ],
+    )
+
+
+def _trig_layout(symmetries):
+    layout = dict(
+        template=template(),
+        title=dict(text="Trigonometric Triangles in All Quadrants"),
+        xaxis=dict(scaleanchor="y", range=[-1.4, 1.4], zeroline=True, showgrid=False),
+        yaxis=dict(range=[-1.4, 1.4], zeroline=True, showgrid=False),
+        margin=dict(t=40, b=10),
+        width=800,
+        height=700,
+    )
+    # Grey out hidden quadrants
+    shapes = [
+        dict(type="rect", **GREY_QUADRANTS[q], fillcolor="gray", opacity=0.3, line=dict(width=0))
+        for q in ("Q2", "Q3", "Q4") if q not in symmetries
+    ]
+    if shapes:
+        layout["shapes"] = shapes
+    return layout
+
+
+def create_trig_connection_figure(unit="degrees", symmetries=[], current_angle="30", trace_layout="classic",
+                                  tolerance_px=config.CURVE_TOLERANCE_PX, render_mode=config.RENDER_MODE):
+    """Reference triangles for ``current_angle`` in Q1 and the chosen quadrants.
+
+    ``trace_layout="consolidated"`` merges same-styled lines and labels into
+    a fixed set of 15 traces whose indices do not depend on the inputs.
+    The circle and arcs stay within ``tolerance_px`` screen pixels of the
+    true shape (0 keeps the original fixed sample counts), and are drawn
+    with WebGL when ``render_mode="webgl"``.
+    """
+    logger.debug("building trig figure unit=%s symmetries=%s current_angle=%s trace_layout=%s",
+                 unit, symmetries, current_angle, trace_layout)
+    angle_deg = float(current_angle)
+    quadrants = ["Q1"] + [q for q in ("Q2", "Q3", "Q4") if q in symmetries]
+    tolerance = geometry.tolerance_px(tolerance_px, TRIG_SCALE)
+    parts = {q: triangle_geometry(q, angle_deg, unit, tolerance) for q in quadrants}
+
+    # Horizontal lines joining symmetric points
+    pairs = []
+    if "Q2" in symmetries:
+        pairs.append((parts["Q2"]["point"], parts["Q1"]["point"]))
+    if "Q3" in symmetries and "Q4" in symmetries:
+        pairs.append((parts["Q3"]["point"], parts["Q4"]["point"]))
+
+    if trace_layout == "consolidated":
+        data = _consolidated_traces(parts, pairs, unit, tolerance)
+    else:
+        data = _classic_traces(parts, pairs, unit, tolerance)
+    fig = dict(data=data, layout=_trig_layout(symmetries))
+    return finalize(use_webgl(fig) if render_mode == "webgl" else fig)
+
+
+def _classic_traces(parts, pairs, unit, tolerance=0):
+    """One trace per line segment, arc and label."""
+    data = []
+
+    # Unit circle
+    theta = np.linspace(0, 2 * np.pi, geometry.arc_samples(1, 2 * np.pi, tolerance, 500))
+    data.append(scatter(x=np.cos(theta), y=np.sin(theta), mode="lines",
+                        line=dict(color="black"), showlegend=False))
+
+    for quadrant, part in parts.items():
+        px, py = part["point"]
+
+        # Triangle sides
+        data.append(scatter(x=[0, px], y=[0, py], mode="lines",
+                            line=dict(color="gray", width=2), showlegend=False))
+        data.append(scatter(x=[0, px], y=[0, 0], mode="lines",
+                            line=dict(color="blue", width=3, dash="dot"), showlegend=False))
+        data.append(scatter(x=[px, px], y=[0, py], mode="lines",
+                            line=dict(color="red", width=3, dash="dot"), showlegend=False))
+
+        # Point marker and coordinate label
+        data.append(scatter(
+            x=[px], y=[py], mode="markers+text",
+            text=[part["point_text"]],
+            textposition="top right",
+            textfont=dict(size=12),
+            marker=dict(color="black", size=7),
+            showlegend=False,
+            hoverinfo="skip"
+        ))
+
+        # Arc + angle label
+        arc_x, arc_y = part["angle_arc"]
+        data.append(scatter(x=arc_x, y=arc_y, mode="lines",
+                            line=dict(color="green", dash="dot"), showlegend=False))
+        if quadrant != "Q1":
+            label_x, label_y = part["angle_label_pos"]
+            data.append(scatter(
+                x=[label_x], y=[label_y],
+                text=[part["angle_label"]], mode="text", textfont=dict(size=10, color="green"), showlegend=False
+            ))
+
+        # Coloured arc (drawn twice) and full angle label
+        arc_x, arc_y = part["full_arc"]
+        for _ in range(2):
+            data.append(scatter(
+                x=arc_x, y=arc_y, mode="lines",
+                line=dict(color=part["arc_color"], dash="dot"), showlegend=False
+            ))
+        label_x, label_y = part["full_label_pos"]
+        data.append(scatter(
+            x=[label_x], y=[label_y],
+            text=[part["full_label"]],
+            mode="text", textfont=dict(size=14),
+            showlegend=False
+        ))
+
+        # Side labels
+        if quadrant == "Q1":
+            for label_x, label_y, text in part["side_labels"]:
+                data.append(scatter(
+                    x=[label_x], y=[label_y], mode="text",
+                    text=[text], textfont=dict(size=13), showlegend=False))
+
+    for (x0, y0), (x1, y1) in pairs:
+        data.append(scatter(
+            x=[x0, x1], y=[y0, y1],
+            mode="lines", line=dict(color="black", dash="dash"), showlegend=False))
+
+    # === Add angle tick marks on the unit circle ===
+    for deg, label in zip(TICK_DEGREES, TICK_LABELS[unit]):
+        rad = np.radians(deg)
+        data.append(scatter(
+            x=[0.97 * np.cos(rad), 1.02 * np.cos(rad)], y=[0.97 * np.sin(rad), 1.02 * np.sin(rad)],
+            mode="lines", line=dict(color="gray", width=1),
+            showlegend=False, hoverinfo="skip"
+        ))
+        data.append(scatter(
+            x=[1.12 * np.cos(rad)], y=[1.12 * np.sin(rad)],
+            mode="text", text=[label],
+            textfont=dict(size=10),
+            showlegend=False, hoverinfo="skip"
+        ))
+
+    return data
+
+
+def _joined(segments):
+    """Concatenate polylines into one x and one y float array separated by NaN gaps.
+
+    NaN is written as null in JSON, and as NaN in base64 typed arrays.
+    """
+    gap = np.array([np.nan])
+    xs, ys = [], []
+    for seg_x, seg_y in segments:
+        if xs:
+            xs.append(gap)
+            ys.append(gap)
+        xs.append(np.asarray(seg_x, dtype=float))
+        ys.append(np.asarray(seg_y, dtype=float))
+    if not xs:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def _consolidated_traces(parts, pairs, unit, tolerance=0):
+    """The same picture as ``_classic_traces`` in a fixed set of 15 traces."""
+    def lines(segments, **style):
+        x, y = _joined(segments)
+        return scatter(x=x, y=y, mode="lines", showlegend=False, **style)
+
+    def texts(items, **style):
+        return scatter(
+            x=[item[0] for item in items], y=[item[1] for item in items], text=[item[2] for item in items],
+            mode="text", showlegend=False, **style
+        )
+
+    theta = np.linspace(0, 2 * np.pi, geometry.arc_samples(1, 2 * np.pi, tolerance, 500))
+    tick_rad = np.radians(TICK_DEGREES)
+    ticks = [([0.97 * np.cos(rad), 1.02 * np.cos(rad)], [0.97 * np.sin(rad), 1.02 * np.sin(rad)]) for rad in tick_rad]
+    points = [part["point"] for part in parts.values()]
+    return [
+        lines([(np.cos(theta), np.sin(theta))], line=dict(color="black")),
+        lines(ticks, line=dict(color="gray", width=1), hoverinfo="skip"),
+        texts([(1.12 * np.cos(rad), 1.12 * np.sin(rad), label) for rad, label in zip(tick_rad, TICK_LABELS[unit])],
+              textfont=dict(size=10), hoverinfo="skip"),
+        lines([([0, px], [0, py]) for px, py in points], line=dict(color="gray", width=2)),
+        lines([([0, px], [0, 0]) for px, py in points], line=dict(color="blue", width=3, dash="dot")),
+        lines([([px, px], [0, py]) for px, py in points], line=dict(color="red", width=3, dash="dot")),
+        lines([part["angle_arc"] for part in parts.values()], line=dict(color="green", dash="dot")),
+        *(
+            lines([parts[q]["full_arc"]] if q in parts else [], line=dict(color=QUADRANT_ARCS[q][1], dash="dot"))
+            for q in ("Q2", "Q3", "Q4")
+        ),
+        lines([([x0, x1], [y0, y1]) for (x0, y0), (x1, y1) in pairs], line=dict(color="black", dash="dash")),
+        scatter(
+            x=[px for px, py in points], y=[py for px, py in points],
+            text=[part["point_text"] for part in parts.values()],
+            mode="markers+text", textposition="top right", textfont=dict(size=12),
+            marker=dict(color="black", size=7), showlegend=False, hoverinfo="skip"
+        ),
+        texts([(*part["angle_label_pos"], part["angle_label"]) for q, part in parts.items() if q != "Q1"],
+              textfont=dict(size=10, color="green")),
+        texts([(*part["full_label_pos"], part["full_label"]) for part in parts.values()], textfont=dict(size=14)),
+        texts(parts["Q1"]["side_labels"], textfont=dict(size=13)),
+    ]
+
+
+# Built figures per (unit, symmetries, angle), used to diff successive views.
+figure_cache = FigureCache(max_entries=config.TRIG_FIGURE_CACHE_SIZE, max_bytes=config.FIGURE_CACHE_MAX_BYTES)
+
+def get_trig_connection_figure(unit="degrees", symmetries=(), angle=30):
+    symmetries = tuple(sorted(symmetries))
+
+    def build():
+        # trig_bundle.load only returns a bundle built with the app's options.
+        if bundle is not None:
+            payload = bundle.get(unit, symmetries, angle)
+            if payload is not None:
+                return json.loads(payload)
+        return create_trig_connection_figure(
+            unit=unit, symmetries=list(symmetries), current_angle=str(angle), trace_layout=config.TRIG_TRACE_LAYOUT
+        )
+
+    return figure_cache.get_or_build((unit, symmetries, angle), build)
+
+
+# Offline-built figures for the whole input grid, when trig_bundle.py has run.
+bundle = trig_bundle.load()
+
+def _bundled_payload(key):
+    return bundle.get(*key) if bundle is not None else None
+
+# Encoded figure JSON per (unit, symmetries, angle) slider position.
+payload_store = FigurePayloadStore(
+    cache=payload_cache("trig", max_entries=config.TRIG_PAYLOAD_CACHE_SIZE, max_bytes=config.FIGURE_PAYLOAD_MAX_BYTES),
+    preloaded=_bundled_payload,
+)
+
+metrics.register_cache("trig_figures", figure_cache)
+metrics.register_cache("trig_payloads", payload_store.cache)